@@ -1,19 +1,16 @@
-import fastf1
+import os
+
 import pandas as pd
 import numpy as np
-import requests
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
-import matplotlib.pyplot as plt
-from sklearn.impute import SimpleImputer
-from xgboost import XGBRegressor
 
-fastf1.Cache.enable_cache("f1_cache")
+from f1_data import load_laps
+from model_registry import train_or_load
+from weather import get_weather
 
-# load the 2024 Qatar session data
-session_2024 = fastf1.get_session(2024, 24, "R")
-session_2024.load()
-laps_2024 = session_2024.laps[["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]].copy()
+# load the 2024 Qatar session data (lap timing only, from the local f1_cache, see f1_data.py)
+laps_2024 = load_laps(2024, 24, "R")
 laps_2024.dropna(inplace=True)
 
 # convert lap and sector times to seconds
@@ -62,51 +59,28 @@ qualifying_2025 = pd.DataFrame({
 
 qualifying_2025["CleanAirRacePace (s)"] = qualifying_2025["Driver"].map(clean_air_race_pace)
 
-# WeatherAPI.com integration
-API_KEY = "4a734687533140f1b1a101427250712"  # Your WeatherAPI key
-location = "Abu Dhabi"  # Yas Marina Circuit location
-weather_url = f"http://api.weatherapi.com/v1/forecast.json?key={API_KEY}&q={location}&days=3&aqi=no&alerts=no"
-
-try:
-    response = requests.get(weather_url)
-    response.raise_for_status()  # Raise an error for bad status codes
-    weather_data = response.json()
-    
-    # Extract forecast for the race day (assuming race is tomorrow)
-    forecast_data = weather_data["forecast"]["forecastday"][1]  # Next day
-    
-    # Get weather conditions for race time (usually 13:00 local time)
-    race_hour_condition = forecast_data["hour"][13]  # 1 PM
-    
-    # Extract relevant weather parameters
-    temperature = race_hour_condition["temp_c"]
-    rain_probability = race_hour_condition["chance_of_rain"] / 100  # Convert from percentage to decimal
-    condition_text = race_hour_condition["condition"]["text"]
-    
-    print(f"📍 Weather forecast for Abu Dhabi GP:")
-    print(f"🌡️  Temperature: {temperature}°C")
-    print(f"🌧️  Rain probability: {rain_probability * 100:.0f}%")
-    print(f"⛅ Condition: {condition_text}")
-    
-except requests.exceptions.RequestException as e:
-    print(f"⚠️  Weather API error: {e}")
-    print("⚠️  Using default weather values")
-    temperature = 28  # Default Abu Dhabi temperature
-    rain_probability = 0.05  # Low rain probability
-    condition_text = "Sunny"
-
-# adjust qualifying time based on weather conditions
+# race day weather (cached, see weather.py - set WEATHERAPI_KEY for live forecasts)
+weather = get_weather("Abu Dhabi")  # Yas Marina Circuit location, race tomorrow
+temperature = weather.temperature
+rain_probability = weather.rain_probability
+condition_text = weather.condition
+
+print(f"📍 Weather forecast for Abu Dhabi GP ({weather.source}):")
+print(f"🌡️  Temperature: {temperature}°C")
+print(f"🌧️  Rain probability: {rain_probability * 100:.0f}%")
+print(f"⛅ Condition: {condition_text}")
+
+# Default wet performance factors (you might want to customize these)
+# always added: the monte carlo simulation below uses them in every scenario where it rains
+wet_performance_factors = {
+    "VER": 1.02, "HAM": 1.01, "LEC": 1.03, "NOR": 1.02, "ALO": 1.04,
+    "PIA": 1.025, "RUS": 1.03, "SAI": 1.04, "STR": 1.05, "HUL": 1.045,
+    "OCO": 1.05, "GAS": 1.05, "ALB": 1.04
+}
+qualifying_2025["WetPerformanceFactor"] = qualifying_2025["Driver"].map(wet_performance_factors)
+
+# adjust qualifying time based on weather conditions (single point prediction)
 if rain_probability >= 0.75:
-    # Add wet performance factor if not already in data
-    if "WetPerformanceFactor" not in qualifying_2025.columns:
-        # Default wet performance factors (you might want to customize these)
-        wet_performance_factors = {
-            "VER": 1.02, "HAM": 1.01, "LEC": 1.03, "NOR": 1.02, "ALO": 1.04,
-            "PIA": 1.025, "RUS": 1.03, "SAI": 1.04, "STR": 1.05, "HUL": 1.045,
-            "OCO": 1.05, "GAS": 1.05, "ALB": 1.04
-        }
-        qualifying_2025["WetPerformanceFactor"] = qualifying_2025["Driver"].map(wet_performance_factors)
-    
     qualifying_2025["QualifyingTime"] = qualifying_2025["QualifyingTime (s)"] * qualifying_2025["WetPerformanceFactor"]
 else:
     qualifying_2025["QualifyingTime"] = qualifying_2025["QualifyingTime (s)"]
@@ -146,16 +120,15 @@ X = merged_data[[
 ]]
 y = laps_2024.groupby("Driver")["LapTime (s)"].mean().reindex(merged_data["Driver"])
 
-# impute missing values for features
-imputer = SimpleImputer(strategy="median")
-X_imputed = imputer.fit_transform(X)
+# train XGBoost model (median imputer + 90/10 split), or load it from model_registry/
+# if it was already trained on exactly this data with these parameters
+params = dict(n_estimators=300, learning_rate=0.9, max_depth=3, random_state=39, monotone_constraints='(1, 0, 0, -1, -1)')
+bundle = train_or_load(X, y, params, test_size=0.1, random_state=39)
+model, imputer = bundle.model, bundle.imputer
+print("🧠 Model", "trained" if bundle.trained else "loaded from registry", bundle.key)
 
-# train-test split
+X_imputed = imputer.transform(X)
 X_train, X_test, y_train, y_test = train_test_split(X_imputed, y, test_size=0.1, random_state=39)
-
-# train XGBoost model
-model = XGBRegressor(n_estimators=300, learning_rate=0.9, max_depth=3, random_state=39, monotone_constraints='(1, 0, 0, -1, -1)')
-model.fit(X_train, y_train)
 merged_data["PredictedRaceTime (s)"] = model.predict(X_imputed)
 
 # sort the results to find the predicted winner
@@ -173,13 +146,36 @@ print(f"🥉 P3: {podium.iloc[2]['Driver']}")
 y_pred = model.predict(X_test)
 print(f"\n Model Error (MAE): {mean_absolute_error(y_test, y_pred):.2f} seconds")
 
-feature_importance = model.feature_importances_
-features = X.columns
-
-plt.figure(figsize=(8,5))
-plt.barh(features, feature_importance, color='skyblue')
-plt.xlabel("Importance")
-plt.title("Feature Importance in Race Time Prediction")
-plt.tight_layout()
-
-plt.show()
+# finishing-position probabilities: RACE_SCENARIOS simulated races (see race_simulator.py)
+# with sampled rain / temperature / pace noise, instead of the one hard rain >= 0.75 switch
+n_scenarios = int(os.getenv("RACE_SCENARIOS", "100000"))
+if n_scenarios > 0:
+    from race_simulator import simulate
+
+    chances = simulate(bundle, merged_data, n_scenarios, rain_probability, temperature)
+    print(f"\n🎲 Win / podium chances over {n_scenarios} simulated races:")
+    print(chances[["Driver", "Win", "Podium", "ExpectedPosition"]].round(3).to_string(index=False))
+
+# feature importance plot: RACE_PLOT=importance.png saves it (works headless),
+# RACE_PLOT=off skips it, default opens a window like before
+plot_target = os.getenv("RACE_PLOT", "show")
+if plot_target != "off":
+    import matplotlib
+    if plot_target != "show":
+        matplotlib.use("Agg")  # no display needed
+    import matplotlib.pyplot as plt
+
+    feature_importance = model.feature_importances_
+    features = X.columns
+
+    plt.figure(figsize=(8,5))
+    plt.barh(features, feature_importance, color='skyblue')
+    plt.xlabel("Importance")
+    plt.title("Feature Importance in Race Time Prediction")
+    plt.tight_layout()
+
+    if plot_target == "show":
+        plt.show()
+    else:
+        plt.savefig(plot_target, dpi=150)
+        print(f"📈 Feature importance saved to {plot_target}")
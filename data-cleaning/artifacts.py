@@ -0,0 +1,140 @@
+# ============================================================================
+# ARTIFACT CACHE - Don't refit the pipeline when the data hasn't changed
+# ============================================================================
+#
+# Fitting StreamingPipeline reads the whole CSV twice. If the file and the
+# settings are the same as last time, the result will be the same too, so we
+# save it once and load it back next time.
+#
+# Cache key = hash of (file CONTENT, every shard of it + pipeline config + FORMAT_VERSION)
+#   - content, not the file name or date: a copied / touched file still hits,
+#     an edited file with the same name misses
+#   - config: --encoding hashed and --encoding onehot are different fits
+#   - FORMAT_VERSION: bump it when the pipeline code changes what it saves
+#
+# Hashing a big file still means reading it, so the hash itself is remembered
+# in hashes.json together with the file's size and modification time: as
+# long as those are unchanged, the file isn't read again.
+#
+# Layout:
+#   .pipeline_cache/
+#     hashes.json               path -> [size, mtime_ns, content hash]
+#     <key>/pipeline.joblib     the fitted transformers
+#     <key>/split.npz           train / test row numbers
+#     <key>/meta.json           source file, config, rows - for humans
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+
+CACHE_DIR = Path(__file__).resolve().parent / ".pipeline_cache"
+FORMAT_VERSION = 1
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_digest(path) -> str:
+    # Reads the file in 1 MiB blocks, so it works for files bigger than RAM
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """
+    Fitted objects on disk, keyed by input content + config
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self._hashes_path = self.cache_dir / "hashes.json"
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def content_hash(self, path) -> str:
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._lock:
+            hashes = self._read_hashes()
+            known = hashes.get(str(path))
+            if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                return known[2]
+
+        digest = file_digest(path)
+        with self._lock:
+            hashes = self._read_hashes()
+            hashes[str(path)] = [stat.st_size, stat.st_mtime_ns, digest]
+            self._write_json(self._hashes_path, hashes)
+        return digest
+
+    def key(self, paths, config: Dict[str, Any]) -> str:
+        # `paths`: one file, or all the shards of a sharded input (in order)
+        if isinstance(paths, (str, Path)):
+            paths = [paths]
+        content = [self.content_hash(path) for path in paths]
+        payload = json.dumps(
+            {"content": content, "config": config, "version": FORMAT_VERSION},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Load / save
+    # ------------------------------------------------------------------
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        {"pipeline": ..., "train_index": ..., "test_index": ...} or None on a miss
+        """
+        folder = self.cache_dir / key
+        try:
+            pipeline = joblib.load(folder / "pipeline.joblib")
+            with np.load(folder / "split.npz") as split:
+                train_index, test_index = split["train_index"], split["test_index"]
+        except (OSError, EOFError, KeyError, ValueError):
+            # Missing, or half-written by a run that crashed -> refit
+            return None
+        return {"pipeline": pipeline, "train_index": train_index, "test_index": test_index}
+
+    def save(self, key: str, pipeline, train_index: np.ndarray, test_index: np.ndarray,
+             meta: Optional[Dict[str, Any]] = None) -> Path:
+        folder = self.cache_dir / key
+        folder.mkdir(parents=True, exist_ok=True)
+        # Write to temp names first and rename, so a crash never leaves a
+        # readable but incomplete artifact behind
+        tmp_pipeline = folder / f"pipeline.joblib.{os.getpid()}.tmp"
+        tmp_split = folder / f"split.{os.getpid()}.tmp.npz"
+        joblib.dump(pipeline, tmp_pipeline)
+        np.savez(tmp_split, train_index=train_index, test_index=test_index)
+        os.replace(tmp_split, folder / "split.npz")
+        os.replace(tmp_pipeline, folder / "pipeline.joblib")
+        self._write_json(folder / "meta.json", {**(meta or {}), "saved_at": time.time()})
+        return folder
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _read_hashes(self) -> Dict[str, list]:
+        try:
+            return json.loads(self._hashes_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_json(self, path: Path, data) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, indent=2, default=str))
+        os.replace(tmp, path)
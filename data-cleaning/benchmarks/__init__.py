@@ -0,0 +1,2 @@
+# Benchmarks for the data-cleaning code
+# Run them from the data-cleaning folder, e.g.  python -m benchmarks.bench_db
@@ -0,0 +1,117 @@
+# ============================================================================
+# BENCHMARK - sync vs async database routes (/db/tasks)
+# ============================================================================
+#
+# Fires many concurrent requests at the sync routes (db_routes.py, run on
+# FastAPI's threadpool) and at the async routes (db_routes_async.py, run on
+# the event loop), then prints throughput and latency percentiles.
+#
+# The app runs in-process through httpx's ASGI transport, so there is no
+# network in the numbers - only routing, the threadpool and the database.
+#
+#   python -m benchmarks.bench_db --requests 5000 --concurrency 200
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def build_app(mode: str):
+    from fastapi import FastAPI
+
+    import db_routes
+    import db_routes_async
+
+    app = FastAPI()
+    app.include_router(db_routes_async.router if mode == "async" else db_routes.router)
+    return app
+
+
+async def run_mode(mode: str, n_requests: int, concurrency: int, n_seed: int, write_ratio: float):
+    import httpx
+
+    app = build_app(mode)
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    rng = random.Random(0)
+    queue = asyncio.Queue()
+    for _ in range(n_requests):
+        queue.put_nowait(rng.random() < write_ratio)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            while not queue.empty():
+                is_write = queue.get_nowait()
+                task_id = rng.randint(1, n_seed)
+                start = time.perf_counter()
+                if is_write:
+                    response = await client.put(f"/db/tasks/{task_id}/complete")
+                else:
+                    response = await client.get(f"/db/tasks/{task_id}")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "requests": n_requests,
+        "throughput_rps": n_requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+def seed(n_seed: int):
+    import crud
+    import schemas
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        crud.create_tasks(db, [schemas.TaskCreate(title=f"task {i}") for i in range(n_seed)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async database routes (/db/tasks)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--seed-tasks", type=int, default=1000)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+
+    # Fresh database file so runs don't affect each other
+    # (must be set before database.py is imported)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_db_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp_dir}/bench.db")
+
+    print(f"{'mode':<6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for mode in args.modes.split(","):
+        seed(args.seed_tasks)
+        result = asyncio.run(
+            run_mode(mode, args.requests, args.concurrency, args.seed_tasks, args.write_ratio)
+        )
+        print(
+            f"{result['mode']:<6} {result['throughput_rps']:>9.0f} "
+            f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['mean_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# ============================================================================
+# BENCHMARK - dense one-hot vs sparse / capped / hashed encoding
+# ============================================================================
+#
+# Runs StreamingPipeline with each encoding on a synthetic customers file
+# (benchmarks/synthetic.py: unique ids / emails / phones like real data) and
+# reports time, peak traced memory and the size of the output matrices.
+#
+#   python -m benchmarks.bench_encoding --rows 5000
+
+import argparse
+import time
+import tracemalloc
+
+from scipy import sparse as sp
+
+from benchmarks.synthetic import cached_customers
+from data import StreamingPipeline
+
+CONFIGS = {
+    "dense onehot": dict(encoding="onehot"),
+    "sparse onehot": dict(encoding="onehot", sparse=True),
+    "sparse capped": dict(encoding="capped", sparse=True, drop_id_columns=True),
+    "sparse hashed": dict(encoding="hashed", sparse=True, n_hash_features=2 ** 12),
+}
+
+
+def matrix_bytes(X) -> int:
+    if sp.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def run(name: str, csv, chunksize: int, options: dict) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    pipeline = StreamingPipeline(chunksize=chunksize, **options).fit(csv)
+    out_bytes = 0
+    width = 0
+    for X_train, X_test, _, _ in pipeline.iter_transform(csv):
+        out_bytes += matrix_bytes(X_train) + matrix_bytes(X_test)
+        width = X_train.shape[1]
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<15} {elapsed:>8.2f} {peak / 2**20:>10.1f} {out_bytes / 2**20:>10.1f} {width:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense one-hot vs sparse / capped / hashed encoding")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--configs", default=",".join(CONFIGS))
+    args = parser.parse_args()
+
+    csv = cached_customers(args.rows)
+    print(f"{args.rows} rows, chunksize {args.chunksize}")
+    print(f"{'encoding':<15} {'seconds':>8} {'peak MiB':>10} {'out MiB':>10} {'features':>9}")
+    for name in args.configs.split(","):
+        run(name, csv, args.chunksize, CONFIGS[name])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# ============================================================================
+# BENCHMARK - overhead of the metrics middleware
+# ============================================================================
+#
+# Calls a do-nothing ASGI app directly (no server, no HTTP parsing) a lot of
+# times, with and without MetricsMiddleware around it. The difference per
+# request is what the middleware itself costs.
+#
+#   python -m benchmarks.bench_middleware --requests 200000
+
+import argparse
+import asyncio
+import time
+
+from middleware import Metrics, MetricsMiddleware
+
+
+class FakeRoute:
+    path = "/tasks/{task_id}"
+
+
+async def noop_app(scope, receive, send):
+    scope["route"] = FakeRoute
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def time_app(app, n_requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/tasks/1"}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead of the metrics middleware")
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    wrapped = MetricsMiddleware(noop_app, Metrics())
+    bare = asyncio.run(time_app(noop_app, args.requests))
+    timed = asyncio.run(time_app(wrapped, args.requests))
+
+    overhead_us = (timed - bare) / args.requests * 1e6
+    print(f"without middleware: {bare / args.requests * 1e6:.2f} us/request")
+    print(f"with middleware:    {timed / args.requests * 1e6:.2f} us/request")
+    print(f"overhead:           {overhead_us:.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# ============================================================================
+# BENCHMARK - how do the pipeline and the task store scale with data size?
+# ============================================================================
+#
+# For every size (default 1e2 .. 1e6 rows, up to 1e7 if you have the time):
+#   pipeline -> StreamingPipeline on a synthetic customers file
+#               (benchmarks/synthetic.py), through its public API:
+#                 read       one bare read_chunks() pass over the file
+#                            (fit reads the file twice, transform once)
+#                 fit        fit(): means, categories, classes + scaler
+#                 transform  iter_transform(): encode, scale, split
+#   store    -> TaskStore (main.py's in-memory tasks): add_many, first page,
+#               filtered page, deep page, ids() snapshot
+# plus the peak RSS of the process.
+#
+# Every size runs in its own fresh Python process, otherwise the peak RSS of
+# a big size would show up as the peak of all the sizes after it.
+#
+# The default encoding is capped + CSR: dense one-hot of the synthetic
+# customers gets as wide as the file is long (13 GiB at 20k rows). --dense /
+# --encoding onehot are there to measure exactly that. A size whose child
+# process dies (MemoryError, OOM killer) is recorded as an error, the other
+# sizes still run.
+#
+# Results are written as JSON (git commit, versions, one record per size),
+# so two commits can be compared:
+#   python -m benchmarks.bench_scaling --rows 100,10000,1000000
+#   python -m benchmarks.bench_scaling --compare results/old.json results/new.json
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from encoding import ENCODING_MODES
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_ROWS = "100,1000,10000,100000,1000000"
+STAGES = ("read", "fit", "transform")
+PRIORITIES = ("low", "medium", "high")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+# ============================================================================
+# Suites (run inside the child process)
+# ============================================================================
+
+def bench_pipeline(n_rows: int, options: dict) -> dict:
+    # Only the public StreamingPipeline API, so this times the real code path
+    from benchmarks.synthetic import cached_customers
+    from data import StreamingPipeline
+
+    path = cached_customers(n_rows)
+    pipeline = StreamingPipeline(**options)
+    timings = {}
+
+    # One bare read of the file: what every pass spends in read_csv
+    start = time.perf_counter()
+    for _ in pipeline.read_chunks(path):
+        pass
+    timings["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline.fit(path)  # no ArtifactCache: always a real fit
+    timings["fit"] = time.perf_counter() - start
+
+    n_features = 0
+    start = time.perf_counter()
+    for X_train, X_test, _, _ in pipeline.iter_transform(path):
+        n_features = X_train.shape[1]
+    timings["transform"] = time.perf_counter() - start
+
+    total = timings["fit"] + timings["transform"]
+    return {
+        "stages_s": {stage: round(seconds, 6) for stage, seconds in timings.items()},
+        "total_s": round(total, 6),
+        "rows_per_s": round(n_rows / total) if total else 0,
+        "features": n_features,
+    }
+
+
+def bench_store(n_rows: int) -> dict:
+    from store import TaskStore
+
+    rng = np.random.default_rng(0)
+    priorities = rng.integers(0, 3, n_rows)
+    completed = rng.random(n_rows) < 0.3
+    store = TaskStore()
+    ids = store.reserve_ids(n_rows)
+    tasks = [
+        SimpleNamespace(id=task_id, title=f"task {task_id}", description=None,
+                        completed=bool(completed[i]), priority=PRIORITIES[priorities[i]])
+        for i, task_id in enumerate(ids)
+    ]
+
+    results = {}
+    start = time.perf_counter()
+    store.add_many(tasks)
+    results["add_many_s"] = time.perf_counter() - start
+
+    def timed(name, func, repeat=20):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        results[name] = best
+
+    middle = ids[len(ids) // 2] if n_rows else 0
+    timed("first_page_s", lambda: store.query(limit=100))
+    timed("filtered_page_s", lambda: store.query(completed=True, priority="high", limit=100))
+    timed("deep_page_s", lambda: store.query(priority="low", after=middle, limit=100))
+    timed("ids_snapshot_s", store.ids, repeat=5)
+    return {name: round(seconds, 9) for name, seconds in results.items()}
+
+
+def run_size(n_rows: int, suites, options: dict) -> dict:
+    record = {"rows": n_rows}
+    if "pipeline" in suites:
+        record["pipeline"] = bench_pipeline(n_rows, options)
+    if "store" in suites:
+        record["store"] = bench_store(n_rows)
+    record["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return record
+
+
+# ============================================================================
+# Driver (parent process)
+# ============================================================================
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment() -> dict:
+    import pandas as pd
+    import sklearn
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def print_record(record: dict) -> None:
+    if "error" in record:
+        print(f"{record['rows']:>10,} rows  FAILED ({record['error']})", flush=True)
+        return
+    line = f"{record['rows']:>10,} rows  peak {record['peak_rss_mb']:>8.1f} MB"
+    if "pipeline" in record:
+        stages = record["pipeline"]["stages_s"]
+        line += "  " + " ".join(f"{s} {stages[s]:.3f}s" for s in STAGES if s in stages)
+        line += f"  ({record['pipeline']['rows_per_s']:,} rows/s)"
+    if "store" in record:
+        line += f"  store add {record['store']['add_many_s']:.3f}s"
+        line += f" page {record['store']['filtered_page_s'] * 1e6:.0f}us"
+    print(line, flush=True)
+
+
+def compare(old_path, new_path) -> None:
+    # new / old time ratio per size and stage (> 1 = slower = regression)
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    print(f"{old['environment']['commit']} -> {new['environment']['commit']} (ratio new/old)")
+    old_by_rows = {r["rows"]: r for r in old["results"]}
+    for record in new["results"]:
+        before = old_by_rows.get(record["rows"])
+        if before is None or "error" in before or "error" in record:
+            continue
+        parts = []
+        if "pipeline" in record and "pipeline" in before:
+            for stage in STAGES:
+                if stage not in before["pipeline"]["stages_s"] or stage not in record["pipeline"]["stages_s"]:
+                    continue  # result file from before the stages changed
+                a, b = before["pipeline"]["stages_s"][stage], record["pipeline"]["stages_s"][stage]
+                parts.append(f"{stage} {b / a:.2f}x" if a else f"{stage} -")
+        for name in ("add_many_s", "filtered_page_s", "deep_page_s"):
+            if "store" in record and "store" in before and before["store"][name]:
+                parts.append(f"{name[:-2]} {record['store'][name] / before['store'][name]:.2f}x")
+        parts.append(f"rss {record['peak_rss_mb'] / before['peak_rss_mb']:.2f}x")
+        print(f"{record['rows']:>10,}: " + "  ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="How the pipeline and the task store scale with data size")
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help="comma separated sizes")
+    parser.add_argument("--suites", default="pipeline,store")
+    parser.add_argument("--encoding", default="capped", choices=ENCODING_MODES)
+    parser.add_argument("--dense", action="store_true", help="dense arrays instead of CSR (needs a lot of memory)")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--out", help="JSON file (default: results/scaling-<commit>-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    suites = args.suites.split(",")
+    options = {"encoding": args.encoding, "sparse": not args.dense, "chunksize": args.chunksize}
+    if args.child is not None:
+        print(json.dumps(run_size(args.child, suites, options)))
+        return
+
+    sizes = [int(float(n)) for n in args.rows.split(",")]
+    if min(sizes) < 1:
+        parser.error("--rows must all be >= 1")
+    results = []
+    for n_rows in sizes:
+        # Fresh process per size, so peak RSS belongs to this size only
+        child = [sys.executable, "-m", "benchmarks.bench_scaling", "--child", str(n_rows),
+                 "--suites", args.suites, "--encoding", args.encoding,
+                 "--chunksize", str(args.chunksize)] + (["--dense"] if args.dense else [])
+        done = subprocess.run(child, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        # Passed on, so a crash still shows its traceback
+        sys.stderr.write(done.stderr)
+        if done.returncode == 0:
+            record = json.loads(done.stdout.strip().splitlines()[-1])
+        else:
+            # MemoryError in Python, or SIGKILL from the kernel's OOM killer
+            oom = "MemoryError" in done.stderr or done.returncode == -9
+            record = {"rows": n_rows, "error": "oom" if oom else f"exit {done.returncode}"}
+        print_record(record)
+        results.append(record)
+
+    report = {"environment": environment(), "options": options, "suites": suites, "results": results}
+    out = Path(args.out) if args.out else (
+        RESULTS_DIR / f"scaling-{report['environment']['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# ============================================================================
+# BENCHMARK - one transaction per write vs the write-behind queue
+# ============================================================================
+#
+# Many threads (like FastAPI's threadpool under a burst) each create tasks:
+#   direct       -> crud.create_task with its own session and commit
+#   write-behind -> crud.create_task submitted to WriteBehindQueue, waiting
+#                   for the group commit (WRITE_BEHIND=commit behaviour)
+#
+#   python -m benchmarks.bench_write_behind --threads 40 --writes 200 --synchronous FULL
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_db import percentile
+
+
+def run(label, write_one, n_threads, n_writes):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for i in range(n_writes):
+            start = time.perf_counter()
+            write_one(i)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = n_threads * n_writes
+    print(
+        f"{label:<13} {total / elapsed:>9.0f} {percentile(latencies, 50) * 1000:>8.2f} "
+        f"{percentile(latencies, 99) * 1000:>8.2f} {statistics.fmean(latencies) * 1000:>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="One transaction per write vs the write-behind queue")
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--writes", type=int, default=100, help="writes per thread")
+    parser.add_argument("--synchronous", default="NORMAL", help="SQLite synchronous PRAGMA")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_wb_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp_dir}/bench.db")
+
+    import crud
+    import database
+    import schemas
+    from database import Base, SessionLocal, engine
+    from write_behind import WriteBehindQueue
+
+    database.SQLITE_PRAGMAS["synchronous"] = args.synchronous
+    Base.metadata.create_all(bind=engine)
+    task = schemas.TaskCreate(title="benchmark task")
+
+    def direct(i):
+        with SessionLocal() as db:
+            crud.create_task(db, task)
+
+    write_queue = WriteBehindQueue(SessionLocal, durability="commit")
+
+    def queued(i):
+        write_queue.submit(crud.create_task, task).result()
+
+    print(f"{'mode':<13} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    run("direct", direct, args.threads, args.writes)
+    run("write-behind", queued, args.threads, args.writes)
+    write_queue.close()
+
+
+if __name__ == "__main__":
+    main()
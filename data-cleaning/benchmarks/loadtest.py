@@ -0,0 +1,304 @@
+# ============================================================================
+# LOAD TEST - throughput and tail latency of the Task Manager API (main.py)
+# ============================================================================
+#
+# Sends a MIX of requests, picked at random with the given weights:
+#   create    POST /tasks
+#   get       GET  /tasks/{id}
+#   complete  PUT  /tasks/{id}/complete
+#   priority  GET  /tasks/priority/{level}
+#   search    GET  /search?q=...
+# and reports per route: requests, errors, req/s, p50 / p95 / p99 / p99.9.
+#
+# Where the requests go:
+#   (default)          in-process, through httpx's ASGI transport (no network,
+#                      no server - just the app)
+#   --uvicorn          starts main:app on a local uvicorn and tests that
+#   --url http://...   an already running server
+#
+# How requests arrive:
+#   closed loop (default)  --concurrency clients, each sends its next request
+#                          when the previous one is answered. Shows the max
+#                          throughput, but a slow server also slows the clients.
+#   open loop (--rate N)   N requests/s arrive on a Poisson schedule no matter
+#                          how fast the server answers - what real users do.
+#                          Latency is measured from the SCHEDULED start, so
+#                          queueing shows up in the tail instead of being hidden
+#                          ("coordinated omission").
+#
+#   python -m benchmarks.loadtest --requests 5000 --concurrency 50
+#   python -m benchmarks.loadtest --uvicorn --rate 500 --duration 20
+#   python -m benchmarks.loadtest --mix get:80,search:20 --out results/load.json
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.bench_db import percentile
+
+DEFAULT_MIX = "create:15,get:45,complete:10,priority:15,search:15"
+ROUTES = {
+    "create": "POST /tasks",
+    "get": "GET /tasks/{task_id}",
+    "complete": "PUT /tasks/{task_id}/complete",
+    "priority": "GET /tasks/priority/{priority_level}",
+    "search": "GET /search",
+}
+PRIORITIES = ("low", "medium", "high")
+WORDS = ("report", "invoice", "deploy", "review", "customer", "meeting", "backup", "release")
+PERCENTILES = (50, 95, 99, 99.9)
+
+
+def parse_mix(text: str):
+    operations, weights = [], []
+    for part in text.split(","):
+        name, _, weight = part.partition(":")
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"unknown operation {name!r}, must be one of {list(ROUTES)}")
+        operations.append(name)
+        weights.append(float(weight or 1))
+    return operations, weights
+
+
+def random_title(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(3))
+
+
+class LoadTest:
+    """
+    One run: the client, the ids we know exist, and the recorded latencies
+    """
+
+    def __init__(self, client, mix: str, seed: int = 0):
+        self.client = client
+        self.operations, self.weights = parse_mix(mix)
+        self.rng = random.Random(seed)
+        self.task_ids = []
+        self.latencies = defaultdict(list)  # route -> seconds
+        self.errors = defaultdict(int)      # route -> non-2xx / failed requests
+
+    async def seed_tasks(self, count: int) -> None:
+        # One bulk request, so the get / complete operations have ids to hit
+        tasks = [{"title": random_title(self.rng), "priority": self.rng.choice(PRIORITIES)}
+                 for _ in range(count)]
+        response = await self.client.post("/tasks/bulk", json=tasks)
+        response.raise_for_status()
+        self.task_ids.extend(response.json()["ids"])
+
+    def _request(self, operation: str):
+        # Returns (method, url, json body) for one random request of this kind
+        if operation == "create":
+            body = {"title": random_title(self.rng), "priority": self.rng.choice(PRIORITIES)}
+            return "POST", "/tasks", body
+        if operation == "search":
+            return "GET", f"/search?q={self.rng.choice(WORDS)}", None
+        if operation == "priority":
+            return "GET", f"/tasks/priority/{self.rng.choice(PRIORITIES)}", None
+        task_id = self.rng.choice(self.task_ids) if self.task_ids else 1
+        if operation == "complete":
+            return "PUT", f"/tasks/{task_id}/complete", None
+        return "GET", f"/tasks/{task_id}", None
+
+    async def one_request(self, scheduled_at=None) -> None:
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        route = ROUTES[operation]
+        method, url, body = self._request(operation)
+        start = time.perf_counter() if scheduled_at is None else scheduled_at
+        try:
+            response = await self.client.request(method, url, json=body)
+            ok = response.status_code < 400
+            if ok and operation == "create":
+                self.task_ids.append(response.json()["id"])
+        except Exception:
+            ok = False
+        self.latencies[route].append(time.perf_counter() - start)
+        if not ok:
+            self.errors[route] += 1
+
+    async def closed_loop(self, concurrency: int, n_requests: int, duration: float) -> float:
+        remaining = n_requests
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+
+        async def client_loop():
+            nonlocal remaining
+            while remaining > 0 and (deadline is None or time.perf_counter() < deadline):
+                remaining -= 1
+                await self.one_request()
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    async def open_loop(self, rate: float, n_requests: int, duration: float) -> float:
+        # Poisson arrivals: exponential gaps with mean 1 / rate
+        started = time.perf_counter()
+        next_at = started
+        in_flight = set()
+        sent = 0
+        while sent < n_requests and (not duration or next_at - started < duration):
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(self.one_request(scheduled_at=next_at))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            sent += 1
+            next_at += self.rng.expovariate(rate)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            routes[route] = summarize(values, self.errors[route], elapsed)
+        everything = [v for values in self.latencies.values() for v in values]
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "total": summarize(everything, sum(self.errors.values()), elapsed),
+            "routes": routes,
+        }
+
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    stats = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+    for pct in PERCENTILES:
+        stats[f"p{pct:g}_ms"] = round(percentile(latencies, pct) * 1000, 3)
+    return stats
+
+
+def print_report(result: dict) -> None:
+    header = f"{'route':<38} {'reqs':>7} {'errs':>5} {'req/s':>9}" + "".join(
+        f" {'p' + format(p, 'g'):>8}" for p in PERCENTILES
+    )
+    print(header + "   (ms)")
+    rows = list(result["routes"].items()) + [("TOTAL", result["total"])]
+    for route, stats in rows:
+        if not stats["requests"]:
+            continue
+        line = f"{route:<38} {stats['requests']:>7} {stats['errors']:>5} {stats['throughput_rps']:>9.1f}"
+        line += "".join(f" {stats[f'p{p:g}_ms']:>8.2f}" for p in PERCENTILES)
+        print(line)
+
+
+# ============================================================================
+# Targets
+# ============================================================================
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_uvicorn(env: dict):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 30s")
+
+
+async def run(args, url=None) -> dict:
+    import httpx
+
+    # One pooled client for the whole run: connections are reused (keep-alive)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if url:
+        client = httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout)
+    else:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits,
+                                   timeout=args.timeout)
+
+    async with client:
+        test = LoadTest(client, args.mix, args.seed)
+        await test.seed_tasks(args.seed_tasks)
+        if args.rate:
+            elapsed = await test.open_loop(args.rate, args.requests, args.duration)
+        else:
+            elapsed = await test.closed_loop(args.concurrency, args.requests, args.duration)
+    return test.report(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the Task Manager API")
+    parser.add_argument("--url", help="test a running server instead of the in-process app")
+    parser.add_argument("--uvicorn", action="store_true", help="start main:app on a local uvicorn")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation:weight,... (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=50, help="clients (closed loop) / max connections")
+    parser.add_argument("--rate", type=float, help="open loop: arrivals per second")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--duration", type=float, default=0, help="seconds; stops early when reached")
+    parser.add_argument("--seed-tasks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the request mix")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--out", help="also write the results as JSON")
+    args = parser.parse_args()
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Throwaway database, so main.py's create_all doesn't touch a real one
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='loadtest_')}/loadtest.db")
+    os.environ.update(env)
+
+    process = None
+    url = args.url
+    if args.uvicorn and not url:
+        process, url = start_uvicorn(env)
+    try:
+        result = asyncio.run(run(args, url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    arrival = f"open loop {args.rate:g}/s" if args.rate else f"closed loop x{args.concurrency}"
+    print(f"target: {url or 'in-process ASGI'}, {arrival}, {result['elapsed_s']}s")
+    print_report(result)
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        result["config"] = {k: v for k, v in vars(args).items() if k != "out"}
+        out.write_text(json.dumps(result, indent=2))
+        print(f"wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
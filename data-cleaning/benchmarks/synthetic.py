@@ -0,0 +1,159 @@
+# ============================================================================
+# SYNTHETIC CUSTOMERS - customers-100.csv, but as many rows as you want
+# ============================================================================
+#
+# Same columns and value formats as dataset/customers-100.csv, built with
+# NumPy (no per-row Python loop) and written chunk by chunk, so 1e7 rows
+# don't need 1e7 rows of memory.
+#
+# Deterministic: the same (n_rows, seed) always gives the same file, byte
+# for byte - chunk k uses a generator seeded with (seed, k). Benchmark runs
+# on different commits therefore see exactly the same data.
+#
+# Cardinality is like real customer data:
+#   Customer Id / Email / phones / Website -> (nearly) unique per row
+#   First / Last Name, Company, City       -> hundreds to a few thousand values
+#   Country                                -> the ~85 countries of the sample
+#
+#   python -m benchmarks.synthetic 1000000 customers-1m.csv
+
+import argparse
+import string
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_CSV = Path(__file__).resolve().parent.parent.parent / "dataset" / "customers-100.csv"
+DATA_DIR = Path(__file__).resolve().parent / ".data"
+CHUNKSIZE = 100_000
+COLUMNS = [
+    "Index", "Customer Id", "First Name", "Last Name", "Company", "City", "Country",
+    "Phone 1", "Phone 2", "Email", "Subscription Date", "Website",
+]
+ID_ALPHABET = np.array(list(string.digits + "abcdefABCDEF"))
+COMPANY_SUFFIXES = np.array(["Group", "Ltd", "PLC", "LLC", "Inc", "and Sons", "Partners"])
+CITY_PREFIXES = np.array(["North", "South", "East", "West", "New", "Port", "Lake", "Mount"])
+DOMAINS = np.array(["example.com", "mail.com", "smith.info", "hogan.com", "colon.com", "post.org"])
+FIRST_DAY = np.datetime64("2020-01-01")
+N_DAYS = 3 * 365
+
+
+def _pools():
+    sample = pd.read_csv(SAMPLE_CSV)
+    pools = {}
+    for key, col in (("first", "First Name"), ("last", "Last Name"), ("country", "Country")):
+        values = sample[col].dropna().unique()
+        # Rows are written without CSV quoting (see write_chunk), so skip
+        # values that would need it
+        pools[key] = np.sort([v for v in values if "," not in v and '"' not in v]).astype(str)
+    return pools
+
+
+def _pick(rng, pool: np.ndarray, n: int) -> np.ndarray:
+    return pool[rng.integers(0, len(pool), n)]
+
+
+def _random_ids(rng, n: int, length: int = 15) -> np.ndarray:
+    # n x length random characters, glued into strings with a view (no loop)
+    chars = ID_ALPHABET[rng.integers(0, len(ID_ALPHABET), (n, length))]
+    return np.ascontiguousarray(chars).view(f"<U{length}").ravel()
+
+
+def _digits(rng, n: int, width: int) -> np.ndarray:
+    return np.strings.zfill(rng.integers(0, 10 ** width, n).astype(str), width)
+
+
+def _join(*parts) -> np.ndarray:
+    # Vectorized string concatenation (np.strings works in C on fixed-width arrays)
+    out = parts[0]
+    for part in parts[1:]:
+        out = np.strings.add(out, part)
+    return out
+
+
+def _phones(rng, n: int) -> np.ndarray:
+    area, middle, last = _digits(rng, n, 3), _digits(rng, n, 3), _digits(rng, n, 4)
+    styles = rng.integers(0, 3, n)
+    dashed = _join(area, "-", middle, "-", last)
+    dotted = _join(area, ".", middle, ".", last)
+    bracketed = _join("(", area, ")", middle, "-", last)
+    return np.where(styles == 0, dashed, np.where(styles == 1, dotted, bracketed))
+
+
+def customers_chunk(start: int, n: int, seed: int, chunk_index: int, pools) -> dict:
+    """
+    Rows start+1 .. start+n of the synthetic file, as column name -> string array
+    """
+    rng = np.random.default_rng([seed, chunk_index])
+    first = _pick(rng, pools["first"], n)
+    last = _pick(rng, pools["last"], n)
+    other_last = _pick(rng, pools["last"], n)
+    number = np.arange(start + 1, start + n + 1).astype(str)
+
+    lower_first, lower_last = np.strings.lower(first), np.strings.lower(last)
+    company = np.where(
+        rng.random(n) < 0.5,
+        _join(last, " ", _pick(rng, COMPANY_SUFFIXES, n)),
+        _join(last, "-", other_last),
+    )
+    days = FIRST_DAY + rng.integers(0, N_DAYS, n).astype("timedelta64[D]")
+
+    return {
+        "Index": number,
+        "Customer Id": _random_ids(rng, n),
+        "First Name": first,
+        "Last Name": last,
+        "Company": company,
+        "City": _join(_pick(rng, CITY_PREFIXES, n), " ", other_last),
+        "Country": _pick(rng, pools["country"], n),
+        "Phone 1": _phones(rng, n),
+        "Phone 2": _phones(rng, n),
+        # The row number keeps these unique, like real addresses
+        "Email": _join(lower_first, ".", lower_last, number, "@", _pick(rng, DOMAINS, n)),
+        "Subscription Date": days.astype(str),
+        "Website": _join("http://www.", lower_last, number, ".com/"),
+    }
+
+
+def write_chunk(f, columns: dict) -> None:
+    # Plain str.join per row - several times faster than DataFrame.to_csv,
+    # and fine because no value contains "," or a quote
+    rows = zip(*(columns[col].tolist() for col in COLUMNS))
+    f.write("\n".join(map(",".join, rows)))
+    f.write("\n")
+
+
+def generate_customers(n_rows: int, path, seed: int = 0, chunksize: int = CHUNKSIZE) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pools = _pools()
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", newline="") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        for chunk_index, start in enumerate(range(0, n_rows, chunksize)):
+            n = min(chunksize, n_rows - start)
+            write_chunk(f, customers_chunk(start, n, seed, chunk_index, pools))
+    tmp.replace(path)
+    return path
+
+
+def cached_customers(n_rows: int, seed: int = 0, data_dir=DATA_DIR) -> Path:
+    # Generated once per (n_rows, seed) and kept in benchmarks/.data/
+    path = Path(data_dir) / f"customers-{n_rows}-seed{seed}.csv"
+    if not path.exists():
+        generate_customers(n_rows, path, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic customers CSV")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_customers(args.rows, args.out, args.seed)
+
+
+if __name__ == "__main__":
+    main()
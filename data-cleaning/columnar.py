@@ -0,0 +1,280 @@
+# ============================================================================
+# COLUMNAR DATASET CACHE - Parse a CSV once, memory-map it afterwards
+# ============================================================================
+#
+# read_csv has to guess every column's type on every run, and it leaves dates
+# like "Subscription Date" as plain strings. Here the types come from an
+# explicit SCHEMA, the CSV is parsed once, and every column is written to its
+# own binary file:
+#
+#   int / float / bool / datetime -> the raw values (<col>.bin)
+#   category / string             -> int32 codes (<col>.bin) + the distinct
+#                                    values (<col>.values.json), i.e.
+#                                    dictionary encoding like olap.Dimension
+#
+# Loading = np.memmap on those files: nothing is read until it's used, and
+# load_csv(..., columns=[...]) only opens the columns you ask for.
+#
+# The cache is rebuilt when the source changes:
+#   same size + mtime          -> valid, the file isn't even opened
+#   other mtime, same content  -> valid (file was copied / touched), the new
+#                                 mtime is written down
+#   other content or schema    -> parse the CSV again
+#
+#   df = load_csv(CUSTOMERS_CSV, CUSTOMERS_SCHEMA, columns=["Country", "Subscription Date"])
+#   python columnar.py          (cold vs warm load times)
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from artifacts import file_digest
+
+CACHE_DIR = Path(__file__).resolve().parent / ".dataset_cache"
+CHUNKSIZE = 100_000
+FORMAT_VERSION = 2  # 2: bool columns parsed from true/false tokens
+
+# Column kind -> dtype of the values in its .bin file
+KIND_DTYPES = {
+    "int": np.dtype(np.int64),
+    "float": np.dtype(np.float64),
+    "bool": np.dtype(np.bool_),
+    "datetime": np.dtype("datetime64[ns]"),
+    "category": np.dtype(np.int32),
+    "string": np.dtype(np.int32),
+}
+MISSING_CODE = -1  # category / string code for an empty cell
+BOOL_VALUES = {"true": True, "false": False, "1": True, "0": False, "yes": True, "no": False}
+# Text of a "bool" cell (any case) -> value; anything else is an error
+
+CUSTOMERS_CSV = Path(__file__).resolve().parent.parent / "dataset" / "customers-100.csv"
+CUSTOMERS_SCHEMA = {
+    "Index": "int",
+    "Customer Id": "string",
+    "First Name": "string",
+    "Last Name": "string",
+    "Company": "string",
+    "City": "category",
+    "Country": "category",
+    "Phone 1": "string",
+    "Phone 2": "string",
+    "Email": "string",
+    "Subscription Date": "datetime",
+    "Website": "string",
+}
+
+
+def _cache_folder(path: Path, cache_dir: Path) -> Path:
+    # One folder per source file (same name in two folders -> two caches)
+    tag = hashlib.blake2b(str(path).encode(), digest_size=4).hexdigest()
+    return cache_dir / f"{path.stem}-{tag}"
+
+
+def _file_name(column: str) -> str:
+    # Column names can have spaces / slashes, file names shouldn't
+    safe = "".join(c if c.isalnum() else "_" for c in column)
+    return f"{safe}-{hashlib.blake2b(column.encode(), digest_size=3).hexdigest()}"
+
+
+# ============================================================================
+# Building the cache
+# ============================================================================
+
+def _convert(values: pd.Series, kind: str, codes: Optional[Dict]) -> np.ndarray:
+    if kind == "datetime":
+        return pd.to_datetime(values, errors="coerce").to_numpy(dtype="datetime64[ns]")
+    if kind in ("category", "string"):
+        # Only the distinct values of the chunk go through the dictionary
+        inverse, uniques = pd.factorize(values)
+        lookup = np.array([codes.setdefault(v, len(codes)) for v in uniques], dtype=np.int32)
+        out = np.full(len(values), MISSING_CODE, dtype=np.int32)
+        present = inverse >= 0
+        out[present] = lookup[inverse[present]]
+        return out
+    if kind == "bool":
+        # astype(bool) would make every non-empty string True, "False" too
+        flags = values.str.strip().str.lower().map(BOOL_VALUES)
+        if flags.isna().any():
+            bad = values[flags.isna()].iloc[0]
+            raise ValueError(f"column {values.name!r} has a missing / non-boolean value {bad!r}, "
+                             "use kind 'category'")
+        return flags.to_numpy(dtype=np.bool_)
+    if kind == "int":
+        numbers = pd.to_numeric(values, errors="coerce")
+        if numbers.isna().any():
+            raise ValueError(f"column {values.name!r} has missing / non-integer values, use kind 'float'")
+        return numbers.to_numpy(dtype=np.int64)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def build_cache(path, schema: Dict[str, str], folder: Path, chunksize: int = CHUNKSIZE) -> dict:
+    """
+    Parses `path` once (in chunks) and writes one file per column into `folder`
+    """
+    for kind in schema.values():
+        if kind not in KIND_DTYPES:
+            raise ValueError(f"unknown column kind {kind!r}, must be one of {list(KIND_DTYPES)}")
+    path = Path(path).resolve()
+    stat = path.stat()
+
+    # Build next to the real folder and swap it in at the end, so a reader
+    # never sees a half-written cache
+    tmp = folder.with_name(f"{folder.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    codes = {col: {} for col, kind in schema.items() if kind in ("category", "string")}
+    files = {col: open(tmp / f"{_file_name(col)}.bin", "wb") for col in schema}
+    rows = 0
+    try:
+        # Everything is read as text, the schema decides the types
+        for chunk in pd.read_csv(path, usecols=list(schema), dtype=str, chunksize=chunksize):
+            for col, kind in schema.items():
+                _convert(chunk[col], kind, codes.get(col)).tofile(files[col])
+            rows += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    columns = {}
+    for col, kind in schema.items():
+        name = _file_name(col)
+        columns[col] = {"kind": kind, "file": f"{name}.bin"}
+        if col in codes:
+            (tmp / f"{name}.values.json").write_text(json.dumps(list(codes[col])))
+            columns[col]["values"] = f"{name}.values.json"
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "source": str(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": file_digest(path),
+        "schema": schema,
+        "rows": rows,
+        "columns": columns,
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(tmp, folder)
+    return manifest
+
+
+# ============================================================================
+# Loading
+# ============================================================================
+
+def _read_manifest(folder: Path) -> Optional[dict]:
+    try:
+        return json.loads((folder / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(manifest: Optional[dict], path: Path, schema: Dict[str, str], folder: Path) -> bool:
+    if manifest is None or manifest.get("version") != FORMAT_VERSION or manifest["schema"] != schema:
+        return False
+    stat = path.stat()
+    if manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if manifest["size"] != stat.st_size or manifest["content_hash"] != file_digest(path):
+        return False
+    # Touched but not changed: remember the new mtime so we don't hash again
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    (folder / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return True
+
+
+def _column(folder: Path, info: dict, rows: int):
+    kind = info["kind"]
+    dtype = KIND_DTYPES[kind]
+    file = folder / info["file"]
+    if rows == 0:
+        data = np.zeros(0, dtype=dtype)
+    else:
+        # Read-only memory map: pages are only read from disk when touched
+        data = np.memmap(file, dtype=dtype, mode="r", shape=(rows,))
+    if kind not in ("category", "string"):
+        return data
+
+    values = json.loads((folder / info["values"]).read_text())
+    categorical = pd.Categorical.from_codes(np.asarray(data), categories=pd.Index(values, dtype=object))
+    if kind == "category":
+        return categorical
+    return np.asarray(categorical, dtype=object)
+
+
+def load_csv(
+    path,
+    schema: Dict[str, str],
+    columns: Optional[Sequence[str]] = None,
+    cache_dir=CACHE_DIR,
+    chunksize: int = CHUNKSIZE,
+) -> pd.DataFrame:
+    """
+    CSV -> DataFrame with the schema's types, through the columnar cache
+    `columns` = only load these (column projection)
+    """
+    path = Path(path).resolve()
+    folder = _cache_folder(path, Path(cache_dir))
+    manifest = _read_manifest(folder)
+    if not _is_fresh(manifest, path, schema, folder):
+        manifest = build_cache(path, schema, folder, chunksize)
+
+    wanted: List[str] = list(columns) if columns is not None else list(schema)
+    missing = [col for col in wanted if col not in manifest["columns"]]
+    if missing:
+        raise KeyError(f"columns not in the schema: {missing}")
+    rows = manifest["rows"]
+    data = {col: _column(folder, manifest["columns"][col], rows) for col in wanted}
+    return pd.DataFrame(data, copy=False)
+
+
+def load_customers(columns: Optional[Sequence[str]] = None, path=CUSTOMERS_CSV) -> pd.DataFrame:
+    return load_csv(path, CUSTOMERS_SCHEMA, columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar cache load times")
+    parser.add_argument("csv", nargs="?", default=CUSTOMERS_CSV)
+    parser.add_argument("--columns", help="comma separated, default: all")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Only customers-100.csv has a schema here; other files get every column as a string
+    schema = CUSTOMERS_SCHEMA
+    if Path(args.csv).resolve() != CUSTOMERS_CSV:
+        header = pd.read_csv(args.csv, nrows=0).columns
+        schema = {col: "string" for col in header}
+    columns = args.columns.split(",") if args.columns else None
+
+    start = time.perf_counter()
+    pd.read_csv(args.csv)
+    print(f"pd.read_csv:        {(time.perf_counter() - start) * 1000:9.2f} ms")
+
+    shutil.rmtree(_cache_folder(Path(args.csv).resolve(), Path(args.cache_dir)), ignore_errors=True)
+    start = time.perf_counter()
+    frame = load_csv(args.csv, schema, columns, cache_dir=args.cache_dir)
+    print(f"cold (parse+write): {(time.perf_counter() - start) * 1000:9.2f} ms")
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        frame = load_csv(args.csv, schema, columns, cache_dir=args.cache_dir)
+        timings.append(time.perf_counter() - start)
+    print(f"warm (memmap):      {min(timings) * 1000:9.2f} ms (best of {args.repeat})")
+    print(frame.dtypes.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# ============================================================================
+# CRUD - All database reads and writes for tasks live here
+# ============================================================================
+#
+# Routes call these functions instead of talking to SQLAlchemy directly.
+# Lists use keyset pagination (WHERE id > cursor ORDER BY id LIMIT n), which
+# the indexes on models.Task answer without scanning the table, and bulk
+# writes go out as ONE executemany statement instead of one ORM round trip
+# per row.
+#
+# Write functions take commit=False when the caller owns the transaction
+# (the write-behind queue runs many of them and commits once).
+
+from typing import List, Optional, Sequence
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+
+
+def end_read(db: Session) -> None:
+    # Ends the read transaction so the connection goes back to the pool NOW.
+    # Otherwise it stays checked out until get_db() closes the session, and
+    # that cleanup has to wait for a free threadpool thread - under load every
+    # thread ends up waiting for a connection held by a request waiting for a
+    # thread. expire_on_commit=False keeps the loaded objects usable.
+    db.commit()
+
+
+def get_task(db: Session, task_id: int) -> Optional[models.Task]:
+    # Primary key lookup (uses the session's identity map if already loaded)
+    task = db.get(models.Task, task_id)
+    end_read(db)
+    return task
+
+
+def tasks_query(
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    after: int = 0,
+    limit: int = 100,
+):
+    # Shared by the sync and async code paths, only the execution differs
+    stmt = select(models.Task).where(models.Task.id > after)
+    if completed is not None:
+        stmt = stmt.where(models.Task.completed == completed)
+    if priority is not None:
+        stmt = stmt.where(models.Task.priority == priority)
+    return stmt.order_by(models.Task.id).limit(limit)
+
+
+def get_tasks(
+    db: Session,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    after: int = 0,
+    limit: int = 100,
+) -> List[models.Task]:
+    tasks = list(db.scalars(tasks_query(completed, priority, after, limit)))
+    end_read(db)
+    return tasks
+
+
+def finish_write(db: Session, commit: bool) -> None:
+    if commit:
+        db.commit()
+    else:
+        db.flush()  # still sends the SQL, so ids / RETURNING values are ready
+
+
+def create_task(db: Session, task: schemas.TaskCreate, commit: bool = True) -> models.Task:
+    db_task = models.Task(**task.model_dump())
+    db.add(db_task)
+    finish_write(db, commit)
+    return db_task
+
+
+def create_tasks(
+    db: Session, tasks: Sequence[schemas.TaskCreate], commit: bool = True
+) -> List[int]:
+    # One INSERT ... executemany for the whole batch, returns the new ids
+    if not tasks:
+        return []
+    rows = [task.model_dump() for task in tasks]
+    ids = list(db.scalars(insert(models.Task).returning(models.Task.id), rows))
+    finish_write(db, commit)
+    return ids
+
+
+# RETURNING rows overwrite a Task that is already in the session (another
+# write to the same id earlier in a write-behind batch), instead of handing
+# back that object with its old values
+UPDATE_OPTIONS = {"synchronize_session": False, "populate_existing": True}
+
+
+def update_task(
+    db: Session, task_id: int, changes: schemas.TaskUpdate, commit: bool = True
+) -> Optional[models.Task]:
+    # UPDATE ... RETURNING: one statement, no SELECT before the write
+    values = changes.model_dump(exclude_unset=True)
+    if not values:
+        # Nothing to change, don't end the caller's transaction either
+        return get_task(db, task_id) if commit else db.get(models.Task, task_id)
+    stmt = (
+        update(models.Task)
+        .where(models.Task.id == task_id)
+        .values(**values)
+        .returning(models.Task)
+    )
+    db_task = db.scalars(stmt, execution_options=UPDATE_OPTIONS).first()
+    finish_write(db, commit)
+    return db_task
+
+
+def complete_task(db: Session, task_id: int, commit: bool = True) -> Optional[models.Task]:
+    return update_task(db, task_id, schemas.TaskUpdate(completed=True), commit=commit)
+
+
+def delete_task(db: Session, task_id: int, commit: bool = True) -> bool:
+    result = db.execute(delete(models.Task).where(models.Task.id == task_id))
+    finish_write(db, commit)
+    return result.rowcount > 0
+
+
+def delete_tasks(db: Session, task_ids: Sequence[int], commit: bool = True) -> int:
+    # One DELETE ... WHERE id IN (...) for the whole batch
+    if not task_ids:
+        return 0
+    result = db.execute(delete(models.Task).where(models.Task.id.in_(task_ids)))
+    finish_write(db, commit)
+    return result.rowcount
@@ -0,0 +1,82 @@
+# ============================================================================
+# ASYNC CRUD - Same as crud.py, but for AsyncSession (DB_MODE=async)
+# ============================================================================
+#
+# The SQL statements are identical; only the execution is awaited, so the
+# event loop can serve other requests while SQLite does the work.
+
+from typing import List, Optional, Sequence
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+import schemas
+from crud import UPDATE_OPTIONS, tasks_query
+
+
+async def get_task(db: AsyncSession, task_id: int) -> Optional[models.Task]:
+    return await db.get(models.Task, task_id)
+
+
+async def get_tasks(
+    db: AsyncSession,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    after: int = 0,
+    limit: int = 100,
+) -> List[models.Task]:
+    result = await db.scalars(tasks_query(completed, priority, after, limit))
+    return list(result)
+
+
+async def create_task(db: AsyncSession, task: schemas.TaskCreate) -> models.Task:
+    db_task = models.Task(**task.model_dump())
+    db.add(db_task)
+    await db.commit()
+    return db_task
+
+
+async def create_tasks(db: AsyncSession, tasks: Sequence[schemas.TaskCreate]) -> List[int]:
+    if not tasks:
+        return []
+    rows = [task.model_dump() for task in tasks]
+    ids = list(await db.scalars(insert(models.Task).returning(models.Task.id), rows))
+    await db.commit()
+    return ids
+
+
+async def update_task(
+    db: AsyncSession, task_id: int, changes: schemas.TaskUpdate
+) -> Optional[models.Task]:
+    values = changes.model_dump(exclude_unset=True)
+    if not values:
+        return await get_task(db, task_id)
+    stmt = (
+        update(models.Task)
+        .where(models.Task.id == task_id)
+        .values(**values)
+        .returning(models.Task)
+    )
+    result = await db.scalars(stmt, execution_options=UPDATE_OPTIONS)
+    db_task = result.first()
+    await db.commit()
+    return db_task
+
+
+async def complete_task(db: AsyncSession, task_id: int) -> Optional[models.Task]:
+    return await update_task(db, task_id, schemas.TaskUpdate(completed=True))
+
+
+async def delete_task(db: AsyncSession, task_id: int) -> bool:
+    result = await db.execute(delete(models.Task).where(models.Task.id == task_id))
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def delete_tasks(db: AsyncSession, task_ids: Sequence[int]) -> int:
+    if not task_ids:
+        return 0
+    result = await db.execute(delete(models.Task).where(models.Task.id.in_(task_ids)))
+    await db.commit()
+    return result.rowcount
@@ -1,61 +1,388 @@
+# ============================================================================
+# DATA PREPROCESSING - Streaming version (works on files bigger than RAM)
+# ============================================================================
+#
+# Same steps as before:
+#   X = every column but the last, y = last column
+#   numeric columns   -> fill missing values with the column mean
+#   other columns     -> one-hot encoding (or capped / hashed, see encoding.py)
+#   y                 -> LabelEncoder
+#   80 / 20 train-test split, StandardScaler fitted on the train rows
+#
+# But the CSV is read CHUNKSIZE rows at a time, so memory depends on the
+# chunk size and not on the file size:
+#   pass 1 (fit)       -> running sums for the means, category discovery,
+#                         target classes
+#   pass 2 (fit)       -> StandardScaler.partial_fit on each train chunk
+#   pass 3 (transform) -> impute / encode / scale each chunk and write it out
+#
+# The split is decided per row with a random generator seeded by
+# (random_state, chunk number), so every pass sees the same split.
+#
+# The input can also be many shards (a folder of .csv files or a glob). They
+# are read in sorted name order, as if they were one big file. With --jobs N
+# pass 1 runs in N processes: every worker counts its own shards and the
+# results are merged in shard order, which gives exactly the same fit as one
+# process (sums are even added up chunk by chunk in the same order, so the
+# float rounding is the same too).
+#
+#   python data.py                                  (customers-100.csv)
+#   python data.py big.csv --chunksize 50000 --out batches/
+#   python data.py "shards/2024-*.csv" --jobs 8
+#   python data.py big.csv --encoding hashed --drop-id-columns   (hashed is always sparse)
+#
+# The fitted pipeline is cached (artifacts.py): running again on the same
+# file with the same options loads the fit instead of redoing passes 1 and 2.
+#   python data.py big.csv --transform new.csv --out scored/
+# scores a new file with the fit of big.csv (no refit, no split).
+
+import argparse
+import copy
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
 import numpy as np
 import pandas as pd
-from sklearn.impute import SimpleImputer
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+from scipy import sparse as sp
+from sklearn.preprocessing import LabelEncoder, StandardScaler
 
-dataset = pd.read_csv('customers-100.csv')
-X = dataset.iloc[:, :-1]
-y = dataset.iloc[:, -1].values
+from artifacts import CACHE_DIR, ArtifactCache
+from encoding import ENCODING_MODES, CategoricalEncoder
 
-numeric_cols = X.select_dtypes(include=[np.number]).columns
-categorical_cols = X.select_dtypes(exclude=[np.number]).columns
+DEFAULT_CSV = Path(__file__).resolve().parent.parent / "dataset" / "customers-100.csv"
+CHUNKSIZE = 100_000
 
-imputer = SimpleImputer(missing_values=np.nan, strategy='mean')
-X[numeric_cols] = imputer.fit_transform(X[numeric_cols])
 
-onehotencoder = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
-X_encoded = onehotencoder.fit_transform(X[categorical_cols])
-X = np.concatenate((X_encoded, X[numeric_cols].values), axis=1)
+def input_files(path) -> List[Path]:
+    """
+    A file, a folder (every .csv in it) or a glob pattern -> sorted list of files
+    """
+    if isinstance(path, (list, tuple)):
+        return [Path(p) for p in path]
+    text = str(path)
+    if glob.has_magic(text):
+        files = sorted(Path(p) for p in glob.glob(text) if Path(p).is_file())
+    elif Path(text).is_dir():
+        files = sorted(Path(text).glob("*.csv"))
+    else:
+        return [Path(text)]
+    if not files:
+        raise FileNotFoundError(f"no CSV files match {text!r}")
+    return files
 
-labelencoder_y = LabelEncoder()
-y = labelencoder_y.fit_transform(y)
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=0)
+class StreamingPipeline:
+    """
+    Chunked fit / transform of the customer preprocessing steps
+    """
 
-sc_X = StandardScaler()
-X_train = sc_X.fit_transform(X_train)
-X_test = sc_X.transform(X_test)
+    def __init__(
+        self,
+        chunksize: int = CHUNKSIZE,
+        test_size: float = 0.2,
+        random_state: int = 0,
+        encoding: str = "onehot",
+        sparse: bool = False,
+        max_categories: int = 50,
+        n_hash_features: Optional[int] = None,
+        drop_id_columns: bool = False,
+    ):
+        # Hashed encoding is always CSR (see encoding.py)
+        sparse = sparse or encoding == "hashed"
+        # Everything that changes the fit - part of the artifact cache key
+        # (chunksize too: the split is seeded per chunk)
+        self.config = {
+            "chunksize": chunksize,
+            "test_size": test_size,
+            "random_state": random_state,
+            "encoding": encoding,
+            "sparse": sparse,
+            "max_categories": max_categories,
+            "n_hash_features": n_hash_features,
+            "drop_id_columns": drop_id_columns,
+        }
+        self.chunksize = chunksize
+        self.test_size = test_size
+        self.random_state = random_state
+        self.sparse = sparse
 
-print(dataset)
+        # Filled in by fit()
+        self.feature_cols: List[str] = []
+        self.target_col: Optional[str] = None
+        self.numeric_cols: List[str] = []
+        self.categorical_cols: List[str] = []
+        self.means: Dict[str, float] = {}
+        self.encoder = CategoricalEncoder(
+            mode=encoding,
+            sparse=sparse,
+            max_categories=max_categories,
+            n_hash_features=n_hash_features,
+            drop_id_columns=drop_id_columns,
+        )
+        self.labelencoder_y = LabelEncoder()
+        self.sc_X = StandardScaler(with_mean=not sparse)
+        # Centering would turn every zero of a sparse matrix into a non-zero
+        self.n_rows = 0
+        self.train_index: Optional[np.ndarray] = None  # row numbers in the file
+        self.test_index: Optional[np.ndarray] = None
+        self.from_cache = False
 
-import numpy as np
-import pandas as pd
-from sklearn.impute import SimpleImputer
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+    def __getstate__(self):
+        # The split is saved next to the pickle (split.npz), not inside it
+        state = dict(self.__dict__)
+        state["train_index"] = state["test_index"] = None
+        return state
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def read_chunks(self, path) -> Iterator[pd.DataFrame]:
+        # All shards one after the other; chunks never span two shards
+        for shard in input_files(path):
+            yield from pd.read_csv(shard, chunksize=self.chunksize)
+
+    def test_mask(self, chunk_index: int, n_rows: int) -> np.ndarray:
+        # True = this row goes to the test set (same answer on every pass)
+        rng = np.random.default_rng([self.random_state, chunk_index])
+        return rng.random(n_rows) < self.test_size
+
+    # ------------------------------------------------------------------
+    # Fit
+    # ------------------------------------------------------------------
+
+    def fit(self, path, cache: Optional[ArtifactCache] = None, jobs: int = 1) -> "StreamingPipeline":
+        """
+        With a cache: loads the fit if this file + config was fitted before,
+        otherwise fits and saves it
+        jobs > 1: pass 1 runs on that many processes (only helps with several shards)
+        """
+        key = cache.key(input_files(path), self.config) if cache is not None else None
+        if key is not None:
+            cached = cache.load(key)
+            if cached is not None:
+                self.__dict__.update(cached["pipeline"].__dict__)
+                self.train_index = cached["train_index"]
+                self.test_index = cached["test_index"]
+                self.from_cache = True
+                return self
+
+        self._fit_stats(path, jobs)
+        self._fit_scaler(path)
+        if key is not None:
+            meta = {"source": str(path), "config": self.config, "rows": self.n_rows}
+            cache.save(key, self, self.train_index, self.test_index, meta)
+        return self
+
+    def _fit_stats(self, path, jobs: int = 1) -> None:
+        # Pass 1: column types, sums / counts for the means, category counts, classes
+        shards = input_files(path)
+        # Column types come from the first chunk of the first shard, like a
+        # single-file run; workers get them instead of guessing their own
+        self._detect_columns(next(iter(pd.read_csv(shards[0], chunksize=self.chunksize))))
+
+        if jobs > 1 and len(shards) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(shards))) as pool:
+                # map() returns results in shard order, whatever order they finish in
+                results = list(pool.map(self._shard_stats, shards))
+        else:
+            results = [self._shard_stats(shard) for shard in shards]
+
+        sums = {col: 0.0 for col in self.numeric_cols}
+        counts = {col: 0 for col in self.numeric_cols}
+        classes = set()
+        for result in results:
+            for chunk_sums in result["chunk_sums"]:
+                for col in self.numeric_cols:
+                    sums[col] += chunk_sums[col]
+            for col in self.numeric_cols:
+                counts[col] += result["counts"][col]
+            self.encoder.merge(result["encoder"])
+            classes.update(result["classes"])
+            self.n_rows += result["n_rows"]
+
+        self.means = {col: sums[col] / counts[col] if counts[col] else 0.0 for col in self.numeric_cols}
+        self.labelencoder_y.classes_ = np.array(sorted(classes), dtype=object)
+        self.encoder.finalize()
+
+    def _shard_stats(self, shard: Path) -> dict:
+        # Pass 1 for ONE shard - runs in a worker process when jobs > 1
+        encoder = copy.deepcopy(self.encoder)  # empty, same settings
+        chunk_sums = []
+        counts = {col: 0 for col in self.numeric_cols}
+        classes = set()
+        n_rows = 0
+        for chunk in pd.read_csv(shard, chunksize=self.chunksize):
+            numeric = self._numeric(chunk)
+            # Per-chunk sums, so the parent adds them in the same order as one process would
+            chunk_sums.append({col: numeric[col].sum() for col in self.numeric_cols})
+            for col in self.numeric_cols:
+                counts[col] += numeric[col].count()
+            encoder.update(chunk, self.categorical_cols)
+            classes.update(chunk[self.target_col].dropna().unique())
+            n_rows += len(chunk)
+        return {"chunk_sums": chunk_sums, "counts": counts, "encoder": encoder,
+                "classes": classes, "n_rows": n_rows}
+
+    def _detect_columns(self, chunk: pd.DataFrame) -> None:
+        X = chunk.iloc[:, :-1]
+        self.feature_cols = list(X.columns)
+        self.target_col = chunk.columns[-1]
+        self.numeric_cols = list(X.select_dtypes(include=[np.number]).columns)
+        self.categorical_cols = list(X.select_dtypes(exclude=[np.number]).columns)
+
+    def _fit_scaler(self, path) -> None:
+        # Pass 2: StandardScaler sees the train rows chunk by chunk
+        # (and the split gets written down as row numbers)
+        train_parts, test_parts = [], []
+        offset = 0
+        for chunk_index, chunk in enumerate(self.read_chunks(path)):
+            X, _ = self._encode(chunk)
+            test = self.test_mask(chunk_index, len(chunk))
+            train = ~test
+            if train.any():
+                self.sc_X.partial_fit(X[train])
+            train_parts.append(offset + np.flatnonzero(train))
+            test_parts.append(offset + np.flatnonzero(test))
+            offset += len(chunk)
+        self.train_index = np.concatenate(train_parts) if train_parts else np.zeros(0, dtype=np.int64)
+        self.test_index = np.concatenate(test_parts) if test_parts else np.zeros(0, dtype=np.int64)
+
+    # ------------------------------------------------------------------
+    # Transform
+    # ------------------------------------------------------------------
+
+    def _numeric(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        # Later chunks may read a numeric column as text if it has junk in it
+        return chunk[self.numeric_cols].apply(pd.to_numeric, errors='coerce')
+
+    def _features(self, chunk: pd.DataFrame):
+        # Impute + encode (not scaled yet)
+        numeric = self._numeric(chunk).fillna(self.means)
+        X_encoded = self.encoder.transform(chunk)
+        if self.sparse:
+            return sp.hstack((X_encoded, sp.csr_matrix(numeric.values)), format="csr")
+        return np.concatenate((X_encoded, numeric.values), axis=1)
+
+    def _encode(self, chunk: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        y = self.labelencoder_y.transform(chunk[self.target_col])
+        return self._features(chunk), y
+
+    def iter_transform(self, path) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Pass 3: yields (X_train, X_test, y_train, y_test) for every chunk
+        """
+        for chunk_index, chunk in enumerate(self.read_chunks(path)):
+            X, y = self._encode(chunk)
+            X = self.sc_X.transform(X)
+            test = self.test_mask(chunk_index, len(chunk))
+            yield X[~test], X[test], y[~test], y[test]
+
+    def transform_chunks(self, path) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """
+        Transform-only fast path for NEW files scored with an existing fit:
+        no split, yields (X, y) per chunk
+        y is None when the file has no target column, and -1 for classes
+        the fit never saw (LabelEncoder would raise on those)
+        """
+        classes = pd.Index(self.labelencoder_y.classes_)
+        for chunk in self.read_chunks(path):
+            X = self.sc_X.transform(self._features(chunk))
+            y = classes.get_indexer(chunk[self.target_col]) if self.target_col in chunk else None
+            yield X, y
 
-dataset = pd.read_csv('customers-100.csv')
-X = dataset.iloc[:, :-1]
-y = dataset.iloc[:, -1].values
+    def write(self, path, out_dir) -> List[Path]:
+        # Writes one .npz file per chunk, so the output is never in memory at once
+        # (sparse: X_train / X_test go to their own scipy .npz files next to it)
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for i, (X_train, X_test, y_train, y_test) in enumerate(self.iter_transform(path)):
+            batch_path = out_dir / f"batch_{i:05d}.npz"
+            if self.sparse:
+                sp.save_npz(out_dir / f"batch_{i:05d}.X_train.npz", X_train)
+                sp.save_npz(out_dir / f"batch_{i:05d}.X_test.npz", X_test)
+                np.savez(batch_path, y_train=y_train, y_test=y_test)
+            else:
+                np.savez(batch_path, X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+            written.append(batch_path)
+        return written
 
-numeric_cols = X.select_dtypes(include=[np.number]).columns
-categorical_cols = X.select_dtypes(exclude=[np.number]).columns
+    def write_transformed(self, path, out_dir) -> List[Path]:
+        # Same as write(), for transform_chunks() output (X / y, no split)
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for i, (X, y) in enumerate(self.transform_chunks(path)):
+            batch_path = out_dir / f"batch_{i:05d}.npz"
+            arrays = {} if y is None else {"y": y}
+            if self.sparse:
+                sp.save_npz(out_dir / f"batch_{i:05d}.X.npz", X)
+            else:
+                arrays["X"] = X
+            np.savez(batch_path, **arrays)
+            written.append(batch_path)
+        return written
 
-imputer = SimpleImputer(missing_values=np.nan, strategy='mean')
-X[numeric_cols] = imputer.fit_transform(X[numeric_cols])
 
-onehotencoder = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
-X_encoded = onehotencoder.fit_transform(X[categorical_cols])
-X = np.concatenate((X_encoded, X[numeric_cols].values), axis=1)
+def main():
+    parser = argparse.ArgumentParser(description="Chunked customer preprocessing")
+    parser.add_argument("csv", nargs="?", default=DEFAULT_CSV, help="CSV file, folder of CSV shards or glob")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--out", help="folder for the transformed .npz batches")
+    parser.add_argument("--encoding", choices=ENCODING_MODES, default="onehot")
+    parser.add_argument("--sparse", action="store_true", help="keep CSR matrices end-to-end")
+    parser.add_argument("--max-categories", type=int, default=50, help="for --encoding capped")
+    parser.add_argument("--hash-features", type=int, default=None,
+                        help="hashing width (default 65536, or 256 for dense output)")
+    parser.add_argument("--drop-id-columns", action="store_true")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="where fitted pipelines are cached")
+    parser.add_argument("--no-cache", action="store_true", help="always refit, don't read or write the cache")
+    parser.add_argument("--transform", metavar="CSV", help="score this file with the fit of `csv` instead")
+    parser.add_argument("--jobs", type=int, default=1, help="processes for pass 1 over shards (0 = all cores)")
+    args = parser.parse_args()
 
-labelencoder_y = LabelEncoder()
-y = labelencoder_y.fit_transform(y)
+    pipeline = StreamingPipeline(
+        chunksize=args.chunksize,
+        encoding=args.encoding,
+        sparse=args.sparse,
+        max_categories=args.max_categories,
+        n_hash_features=args.hash_features,
+        drop_id_columns=args.drop_id_columns,
+    )
+    start = time.perf_counter()
+    jobs = args.jobs or os.cpu_count()
+    pipeline.fit(args.csv, cache=None if args.no_cache else ArtifactCache(args.cache_dir), jobs=jobs)
+    source = "loaded from cache" if pipeline.from_cache else "fitted"
+    print(f"pipeline {source} in {time.perf_counter() - start:.2f}s")
+    print(f"rows: {pipeline.n_rows}")
+    print(f"numeric columns: {pipeline.numeric_cols}")
+    print(f"categorical columns: {pipeline.encoder.plan}")
+    print(f"target: {pipeline.target_col} ({len(pipeline.labelencoder_y.classes_)} classes)")
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=0)
+    if args.transform:
+        if args.out:
+            batches = pipeline.write_transformed(args.transform, args.out)
+            print(f"wrote {len(batches)} batches to {args.out}")
+        else:
+            n_rows = 0
+            for X, _ in pipeline.transform_chunks(args.transform):
+                n_rows += X.shape[0]
+            print(f"{args.transform}: {n_rows} rows, {X.shape[1]} features")
+    elif args.out:
+        batches = pipeline.write(args.csv, args.out)
+        print(f"wrote {len(batches)} batches to {args.out}")
+    else:
+        n_train = n_test = 0
+        for X_train, X_test, _, _ in pipeline.iter_transform(args.csv):
+            n_train += X_train.shape[0]
+            n_test += X_test.shape[0]
+        print(f"X_train: {n_train} rows, X_test: {n_test} rows, {X_train.shape[1]} features")
 
-sc_X = StandardScaler()
-X_train = sc_X.fit_transform(X_train)
-X_test = sc_X.transform(X_test)
 
-print(dataset)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, Integer, String
-from sclalchemy.ext.declarative import declarative_base
 
-DATABASE_URL = "sqlite:///./test.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+
+# DB_MODE picks which routes main.py mounts under /db/tasks:
+#   sync  -> plain `def` routes + Session (run on FastAPI's threadpool)
+#   async -> `async def` routes + AsyncSession (run on the event loop)
+DB_MODE = os.getenv("DB_MODE", "sync")
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
 
 # we will now create a session
 # session local = ek facotry hai for creating the database sessions
@@ -11,27 +20,103 @@ DATABASE_URL = "sqlite:///./test.db"
 # autocommit = false, we dont want autosave as of now we want the control of the commands
 # autoflush = false, to the database we dont want to flush the changes automatically
 
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# FastAPI runs plain `def` routes on a threadpool of 40 threads (anyio default)
+# so the pool should let each of them hold a connection without waiting
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "20"))
+
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # only for SQLite
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},  # only for SQLite
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_MAX_OVERFLOW,
+    pool_timeout=10,  # seconds to wait for a free connection before erroring
 )
 
 # Engine = connection to the database
 # check_same_thread=False is needed for SQLite with FastAPI
 # (allows multiple threads to use the same connection)
 
-SessionLoccal = sessionmaker (
+# SQLite tuning, run once for every new connection the pool opens:
+# journal_mode=WAL     -> readers don't block the writer (and the other way round)
+# synchronous=NORMAL   -> with WAL, fsync only at checkpoints, not every commit
+# mmap_size            -> read pages through memory mapping instead of read() calls
+# temp_store=MEMORY    -> temp tables / sort buffers stay in RAM
+# cache_size=-64000    -> 64 MB page cache per connection (negative = KB)
+# busy_timeout         -> wait up to 5 s for the write lock instead of failing
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "cache_size": -64000,
+    "busy_timeout": 5000,
+}
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+
+SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
+    expire_on_commit=False,  # don't reload every object after commit
     bind=engine
 )
 
 Base = declarative_base()
 
 def get_db():
-    db = sessionLocal()
+    db = SessionLocal()
     try:
         yield db # to give the session to the endpoint
     finally:
         db.close() 
 
+
+# ============================================================================
+# ASYNC ENGINE (DB_MODE=async)
+# ============================================================================
+# Created on first use, so the aiosqlite driver is only needed in async mode.
+# async routes don't use threads at all, so the pool size is about open
+# connections, not about how many requests can run at once.
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=POOL_SIZE,
+            max_overflow=POOL_MAX_OVERFLOW,
+            pool_timeout=10,
+        )
+        if ASYNC_DATABASE_URL.startswith("sqlite"):
+            # Same PRAGMAs as the sync engine (listener goes on the sync core)
+            event.listen(_async_engine.sync_engine, "connect", set_sqlite_pragmas)
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _async_engine
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db # same as get_db, but the endpoint awaits the queries
@@ -0,0 +1,110 @@
+# ============================================================================
+# DATABASE ROUTES - Task API backed by SQLite / SQLAlchemy (models.Task)
+# ============================================================================
+#
+# Same ideas as the in-memory routes in main.py, but the data survives
+# restarts. Mounted under /db/tasks by main.py.
+# Each request gets its own Session from get_db() (see database.py).
+# Writes go through the write-behind queue when WRITE_BEHIND is switched on
+# (see write_behind.py).
+
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+import crud
+import schemas
+from database import get_db
+from write_behind import create_write_queue
+
+router = APIRouter(prefix="/db/tasks", tags=["database"])
+
+MAX_PAGE_SIZE = 1000
+
+write_queue = create_write_queue()
+# None when WRITE_BEHIND=off
+
+
+def queued_response() -> JSONResponse:
+    # WRITE_BEHIND=enqueue: the write is accepted but not committed yet
+    return JSONResponse({"status": "queued"}, status_code=status.HTTP_202_ACCEPTED)
+
+
+def write(db: Session, func, *args):
+    # Runs a crud write directly, or hands it to the write-behind queue
+    if write_queue is None:
+        return func(db, *args)
+    future = write_queue.submit(func, *args)
+    if write_queue.ack_on_enqueue:
+        return queued_response()
+    return future.result()  # waits until the batch is committed
+
+
+@router.post("", response_model=schemas.TaskResponse, status_code=status.HTTP_201_CREATED)
+def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
+    return write(db, crud.create_task, task)
+
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+def create_tasks(tasks: List[schemas.TaskCreate], db: Session = Depends(get_db)):
+    # Whole array is inserted with one statement
+    ids = write(db, crud.create_tasks, tasks)
+    if isinstance(ids, Response):
+        return ids
+    return {"created": len(ids), "ids": ids}
+
+
+@router.get("", response_model=List[schemas.TaskResponse])
+def get_tasks(
+    response: Response,
+    completed: Optional[bool] = None,
+    priority: Optional[Literal["low", "medium", "high"]] = None,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    page = crud.get_tasks(db, completed, priority, after=cursor, limit=limit)
+    if len(page) == limit:
+        # Might be more -> same X-Next-Cursor header as the in-memory routes
+        response.headers["X-Next-Cursor"] = str(page[-1].id)
+    return page
+
+
+@router.get("/{task_id}", response_model=schemas.TaskResponse)
+def get_task(task_id: int, db: Session = Depends(get_db)):
+    task = crud.get_task(db, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.patch("/{task_id}", response_model=schemas.TaskResponse)
+def update_task(task_id: int, changes: schemas.TaskUpdate, db: Session = Depends(get_db)):
+    task = write(db, crud.update_task, task_id, changes)
+    if isinstance(task, Response):
+        return task
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.put("/{task_id}/complete", response_model=schemas.TaskResponse)
+def complete_task(task_id: int, db: Session = Depends(get_db)):
+    task = write(db, crud.complete_task, task_id)
+    if isinstance(task, Response):
+        return task
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_task(task_id: int, db: Session = Depends(get_db)):
+    deleted = write(db, crud.delete_task, task_id)
+    if isinstance(deleted, Response):
+        return deleted
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
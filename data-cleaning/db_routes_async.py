@@ -0,0 +1,113 @@
+# ============================================================================
+# ASYNC DATABASE ROUTES - Same as db_routes.py, with `async def` handlers
+# ============================================================================
+#
+# Used when DB_MODE=async. The handlers run on the event loop and await the
+# database (aiosqlite for local runs), so a slow query doesn't tie up one of
+# the threadpool's 40 threads. Mounted under /db/tasks by main.py.
+# With WRITE_BEHIND switched on, writes are awaited on the write-behind queue.
+
+import asyncio
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+import crud_async
+import schemas
+from database import get_async_db
+from db_routes import MAX_PAGE_SIZE, queued_response, write_queue
+
+router = APIRouter(prefix="/db/tasks", tags=["database"])
+
+
+async def queued_write(func, *args):
+    # Same as db_routes.write(), but awaits the batch commit
+    # instead of blocking a thread on it
+    future = write_queue.submit(func, *args)
+    if write_queue.ack_on_enqueue:
+        return queued_response()
+    return await asyncio.wrap_future(future)
+
+
+@router.post("", response_model=schemas.TaskResponse, status_code=status.HTTP_201_CREATED)
+async def create_task(task: schemas.TaskCreate, db: AsyncSession = Depends(get_async_db)):
+    if write_queue is not None:
+        return await queued_write(crud.create_task, task)
+    return await crud_async.create_task(db, task)
+
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+async def create_tasks(tasks: List[schemas.TaskCreate], db: AsyncSession = Depends(get_async_db)):
+    if write_queue is not None:
+        ids = await queued_write(crud.create_tasks, tasks)
+        if isinstance(ids, Response):
+            return ids
+    else:
+        ids = await crud_async.create_tasks(db, tasks)
+    return {"created": len(ids), "ids": ids}
+
+
+@router.get("", response_model=List[schemas.TaskResponse])
+async def get_tasks(
+    response: Response,
+    completed: Optional[bool] = None,
+    priority: Optional[Literal["low", "medium", "high"]] = None,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    page = await crud_async.get_tasks(db, completed, priority, after=cursor, limit=limit)
+    if len(page) == limit:
+        response.headers["X-Next-Cursor"] = str(page[-1].id)
+    return page
+
+
+@router.get("/{task_id}", response_model=schemas.TaskResponse)
+async def get_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    task = await crud_async.get_task(db, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.patch("/{task_id}", response_model=schemas.TaskResponse)
+async def update_task(
+    task_id: int, changes: schemas.TaskUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    if write_queue is not None:
+        task = await queued_write(crud.update_task, task_id, changes)
+        if isinstance(task, Response):
+            return task
+    else:
+        task = await crud_async.update_task(db, task_id, changes)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.put("/{task_id}/complete", response_model=schemas.TaskResponse)
+async def complete_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    if write_queue is not None:
+        task = await queued_write(crud.complete_task, task_id)
+        if isinstance(task, Response):
+            return task
+    else:
+        task = await crud_async.complete_task(db, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    if write_queue is not None:
+        deleted = await queued_write(crud.delete_task, task_id)
+        if isinstance(deleted, Response):
+            return deleted
+    else:
+        deleted = await crud_async.delete_task(db, task_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
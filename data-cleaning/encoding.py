@@ -0,0 +1,206 @@
+# ============================================================================
+# CATEGORICAL ENCODING - one-hot that doesn't explode on high-cardinality columns
+# ============================================================================
+#
+# Plain one-hot makes one column per distinct value. For columns like
+# "Customer Id" or "Email" every row is distinct, so the matrix gets as wide
+# as the file is long - rows x rows cells, almost all of them zero.
+#
+# Options (CategoricalEncoder(mode=...)):
+#   onehot  -> one column per value (the old behaviour)
+#   capped  -> one column per value for the max_categories most frequent
+#              values, everything else goes to a shared "other" column
+#   hashed  -> hashing trick: "col=value" is hashed into n_hash_features
+#              columns, fixed width no matter how many values there are
+#              (always CSR output, 2**16 mostly-zero columns would not fit
+#              in memory as a dense array)
+# plus:
+#   sparse=True          -> CSR matrices instead of dense arrays (one-hot
+#                           output is mostly zeros, so this saves a lot)
+#   n_hash_features      -> hashing width, default 2**16 for CSR output and
+#                           DENSE_HASH_FEATURES when high-cardinality columns
+#                           get hashed into a dense array
+#   drop_id_columns=True -> leave out ID-like columns (nearly every value
+#                           distinct, or a name like "Id" / "Email" / "Phone")
+#
+# Benchmark against the dense path with:  python -m benchmarks.bench_encoding
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.preprocessing import OneHotEncoder
+
+ENCODING_MODES = ("onehot", "capped", "hashed")
+SPARSE_HASH_FEATURES = 2 ** 16
+DENSE_HASH_FEATURES = 2 ** 8
+OTHER = "__other__"
+ID_NAME_PATTERN = re.compile(r"(^|[\s_])(id|uuid|email|e-mail|phone|website|url)([\s_\d]|$)", re.I)
+
+
+class CategoricalEncoder:
+    """
+    Streaming-friendly categorical encoder
+    update() on every chunk (pass 1), finalize(), then transform() chunks
+    """
+
+    def __init__(
+        self,
+        mode: str = "onehot",
+        sparse: bool = False,
+        max_categories: int = 50,
+        n_hash_features: Optional[int] = None,
+        drop_id_columns: bool = False,
+        id_ratio: float = 0.99,
+        max_tracked_categories: int = 100_000,
+    ):
+        if mode not in ENCODING_MODES:
+            raise ValueError(f"mode must be one of {ENCODING_MODES}, got {mode!r}")
+        self.mode = mode
+        self.sparse = sparse or mode == "hashed"
+        self.max_categories = max_categories
+        if n_hash_features is None:
+            n_hash_features = SPARSE_HASH_FEATURES if self.sparse else DENSE_HASH_FEATURES
+        self.n_hash_features = n_hash_features
+        self.drop_id_columns = drop_id_columns
+        self.id_ratio = id_ratio
+        self.max_tracked_categories = max_tracked_categories
+
+        self.columns: List[str] = []
+        self.counts: Dict[str, Optional[Counter]] = {}
+        # None = too many distinct values to keep counting (high cardinality)
+        self.n_rows = 0
+
+        # Filled in by finalize()
+        self.plan: Dict[str, str] = {}            # column -> onehot / capped / hashed / dropped
+        self.categories: Dict[str, List] = {}
+        self.onehotencoder: Optional[OneHotEncoder] = None
+        self.hasher: Optional[FeatureHasher] = None
+
+    # ------------------------------------------------------------------
+    # Pass 1: value counts
+    # ------------------------------------------------------------------
+
+    def update(self, chunk: pd.DataFrame, columns: List[str]) -> None:
+        if not self.columns:
+            self.columns = list(columns)
+            self.counts = {col: Counter() for col in self.columns}
+        self.n_rows += len(chunk)
+        for col in self.columns:
+            counter = self.counts[col]
+            if counter is None:
+                continue
+            counter.update(chunk[col].dropna().value_counts().to_dict())
+            if len(counter) > self.max_tracked_categories:
+                self.counts[col] = None  # stop counting, this will be hashed or dropped
+
+    def merge(self, other: "CategoricalEncoder") -> None:
+        # Adds the counts of an encoder that saw other rows (another shard)
+        # Merging shards in file order gives the same counts - in the same
+        # insertion order, which most_common() uses for ties - as one update() run
+        if not other.columns:
+            return
+        if not self.columns:
+            self.columns = list(other.columns)
+            self.counts = {col: Counter() for col in self.columns}
+        self.n_rows += other.n_rows
+        for col in self.columns:
+            counter, theirs = self.counts[col], other.counts[col]
+            if counter is None:
+                continue
+            if theirs is None:
+                self.counts[col] = None
+                continue
+            counter.update(theirs)
+            if len(counter) > self.max_tracked_categories:
+                self.counts[col] = None
+
+    def is_id_like(self, col: str) -> bool:
+        counter = self.counts[col]
+        if counter is None or ID_NAME_PATTERN.search(col):
+            return True
+        return self.n_rows > 0 and len(counter) >= self.id_ratio * self.n_rows
+
+    # ------------------------------------------------------------------
+    # Decide how every column gets encoded
+    # ------------------------------------------------------------------
+
+    def finalize(self) -> "CategoricalEncoder":
+        for col in self.columns:
+            counter = self.counts[col]
+            if self.drop_id_columns and self.is_id_like(col):
+                self.plan[col] = "dropped"
+            elif self.mode == "hashed" or counter is None:
+                self.plan[col] = "hashed"
+            elif self.mode == "capped" and len(counter) > self.max_categories:
+                top = [value for value, _ in counter.most_common(self.max_categories)]
+                self.categories[col] = sorted(top) + [OTHER]
+                self.plan[col] = "capped"
+            else:
+                self.categories[col] = sorted(counter)
+                self.plan[col] = "onehot"
+
+        onehot_cols = self.onehot_columns
+        if onehot_cols:
+            self.onehotencoder = OneHotEncoder(
+                categories=[self.categories[col] for col in onehot_cols],
+                handle_unknown='ignore',
+                sparse_output=self.sparse,
+            )
+            # Categories are already known, one row is enough to set it up
+            sample = pd.DataFrame({col: [self.categories[col][0]] for col in onehot_cols})
+            self.onehotencoder.fit(sample)
+        if self.hashed_columns:
+            self.hasher = FeatureHasher(
+                n_features=self.n_hash_features, input_type="string", alternate_sign=False
+            )
+        return self
+
+    @property
+    def onehot_columns(self) -> List[str]:
+        return [col for col in self.columns if self.plan.get(col) in ("onehot", "capped") and self.categories[col]]
+
+    @property
+    def hashed_columns(self) -> List[str]:
+        return [col for col in self.columns if self.plan.get(col) == "hashed"]
+
+    @property
+    def n_features(self) -> int:
+        width = sum(len(self.categories[col]) for col in self.onehot_columns)
+        return width + (self.n_hash_features if self.hashed_columns else 0)
+
+    # ------------------------------------------------------------------
+    # Transform
+    # ------------------------------------------------------------------
+
+    def transform(self, chunk: pd.DataFrame):
+        """
+        Encoded chunk: dense ndarray, or CSR matrix when sparse=True
+        """
+        blocks = []
+        onehot_cols = self.onehot_columns
+        if onehot_cols:
+            frame = chunk[onehot_cols].copy()
+            for col in onehot_cols:
+                if self.plan[col] == "capped":
+                    # Rare values all land in the "other" column
+                    known = frame[col].isin(self.categories[col]) | frame[col].isna()
+                    frame[col] = frame[col].where(known, OTHER)
+            blocks.append(self.onehotencoder.transform(frame))
+
+        hashed_cols = self.hashed_columns
+        if hashed_cols:
+            tokens = [(col + "=" + chunk[col].astype(str)).to_numpy() for col in hashed_cols]
+            hashed = self.hasher.transform(zip(*tokens))
+            blocks.append(hashed if self.sparse else hashed.toarray())
+
+        if not blocks:
+            empty = np.zeros((len(chunk), 0))
+            return sp.csr_matrix(empty) if self.sparse else empty
+        if self.sparse:
+            return sp.hstack(blocks, format="csr")
+        return np.concatenate(blocks, axis=1)
@@ -0,0 +1,88 @@
+# ============================================================================
+# STREAMING EXPORT - Send every task without building one giant list
+# ============================================================================
+#
+# GET /tasks used to build the whole list, then serialize it all at once.
+# For big exports that means a memory spike and a long wait for the first byte.
+#
+# Here we:
+#   1. take a snapshot of the task ids (just a list of ints)
+#   2. serialize tasks EXPORT_CHUNK_SIZE at a time and yield each chunk
+#   3. remember the JSON bytes of every task in RowCache, so the next export
+#      reuses them. The store tells the cache when a task changes, and only
+#      that task's bytes are thrown away.
+
+import threading
+from typing import Dict, Iterator
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+class RowCache:
+    """
+    Pre-serialized JSON bytes per task id
+    Subscribe on_change to the TaskStore so changed tasks get invalidated
+    """
+
+    def __init__(self):
+        self._rows: Dict[int, bytes] = {}
+        self._generation = 0
+        # Bumped on every invalidation. A row serialized while a change
+        # happened is not cached, because it might hold the old values.
+        self._lock = threading.Lock()
+
+    def on_change(self, event: str, task) -> None:
+        with self._lock:
+            self._generation += 1
+            self._rows.pop(task.id, None)
+
+    def get(self, task) -> bytes:
+        row = self._rows.get(task.id)
+        if row is not None:
+            return row
+
+        generation = self._generation
+        row = task.model_dump_json().encode()
+        with self._lock:
+            if generation == self._generation:
+                self._rows[task.id] = row
+        return row
+
+
+def iter_export(store, cache: RowCache, format: str = "ndjson") -> Iterator[bytes]:
+    """
+    Yields the export body in chunks of EXPORT_CHUNK_SIZE tasks
+    ndjson -> one task per line
+    json   -> one JSON array
+    """
+    ids = store.ids()
+    separator = b"\n" if format == "ndjson" else b","
+
+    if format == "json":
+        yield b"["
+
+    first = True
+    for start in range(0, len(ids), EXPORT_CHUNK_SIZE):
+        rows = []
+        for task_id in ids[start:start + EXPORT_CHUNK_SIZE]:
+            task = store.get(task_id)
+            if task is not None:
+                # Deleted since the snapshot -> skip it
+                rows.append(cache.get(task))
+        if not rows:
+            continue
+
+        chunk = separator.join(rows)
+        if format == "ndjson":
+            chunk += b"\n"
+        elif not first:
+            chunk = b"," + chunk
+        first = False
+        yield chunk
+
+    if format == "json":
+        yield b"]"
@@ -2,21 +2,56 @@
 # IMPORTS - Bringing in the tools we need
 # ============================================================================
 
-from fastapi import FastAPI, Path, HTTPException, status
+from fastapi import FastAPI, Path, Query, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 # FastAPI: The main framework for building our API
 # Path: For validating path parameters (like task_id in /tasks/{task_id})
+# Query: For validating query parameters (like ?limit=50)
+# Request: Raw access to the request body (used to stream NDJSON uploads)
+# JSONResponse: Lets us send JSON directly without re-validating every item
+# StreamingResponse: Sends the body piece by piece (used by the export)
 # HTTPException: For returning proper error responses
 # status: Contains HTTP status code constants (like 404, 201, etc.)
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 # BaseModel: Base class for creating data models with validation
 # Field: Adds extra validation rules to model fields (like max_length, min, max)
+# ValidationError: Raised by pydantic when data doesn't match a model
+
+import json
+# json: For parsing request bodies ourselves in the bulk endpoints
 
 from typing import Optional, Literal, List
 # Optional: Makes a field optional (can be None)
 # Literal: Restricts values to specific options (like "low", "medium", "high")
 # List: For specifying that something is a list of items
 
+from store import TaskStore
+# TaskStore: In-memory tasks with indexes, so lookups don't loop over every task
+
+from export import EXPORT_MEDIA_TYPES, RowCache, iter_export
+# Streaming export of all tasks, with cached JSON bytes per task
+
+from middleware import install_metrics
+# install_metrics: Per-route latency histograms + GET /metrics (Prometheus)
+
+from olap import TaskCube, customers_cube
+# Pre-aggregated cubes for reports (counts by priority x completed x day, ...)
+
+from profiling import install_profiling
+# install_profiling: Opt-in cProfile / tracemalloc for single requests
+
+from response_cache import ResponseCache
+# ResponseCache: Reuses list responses until the data changes (ETag / 304)
+
+from search import SearchIndex
+# SearchIndex: Full-text search (inverted index + BM25) over title/description
+
+import db_routes
+from database import DB_MODE, Base, engine
+# Database-backed version of the task routes (SQLite + SQLAlchemy)
+# DB_MODE=sync or DB_MODE=async picks which version gets mounted
+
 
 # ============================================================================
 # APP INITIALIZATION
@@ -26,20 +61,48 @@ app = FastAPI()
 # Creates your FastAPI application instance
 # This is the main object that handles all your routes and requests
 
+Base.metadata.create_all(bind=engine)
+if DB_MODE == "async":
+    import db_routes_async  # needs sqlalchemy[asyncio] + aiosqlite
+    app.include_router(db_routes_async.router)
+else:
+    app.include_router(db_routes.router)
+# Creates the tables if they don't exist yet and adds the /db/tasks routes
+
+metrics = install_metrics(app)
+# Times every request, see GET /metrics
+
+profiles = install_profiling(app)
+# Only active when PROFILE_TOKEN is set (None otherwise), see profiling.py
+
 
 # ============================================================================
 # IN-MEMORY STORAGE (Temporary - will be replaced with database later)
 # ============================================================================
 
-tasks = []
-# Empty list to store all our tasks
+store = TaskStore()
+# Holds all our tasks, indexed by id, completed and priority (see store.py)
 # Currently stores data in RAM (memory)
 # WARNING: All data is lost when server restarts!
+# The store also hands out ids: first task gets ID 1, second gets ID 2, etc.
 
-task_id_counter = 1
-# Keeps track of the next ID to assign to a new task
-# Starts at 1, increments each time we create a task
-# Example: First task gets ID 1, second gets ID 2, etc.
+export_cache = RowCache()
+store.subscribe(export_cache.on_change)
+# Cached JSON bytes for the export, thrown away per task when it changes
+
+search_index = SearchIndex()
+store.subscribe(search_index.on_change)
+# Updated on every create / update / delete, so /search never rescans tasks
+
+list_cache = ResponseCache(max_entries=256)
+# Finished list responses, valid while store.version stays the same
+
+task_cube = TaskCube()
+store.subscribe(task_cube.on_change)
+# Counts per priority x completed x day, updated on every change
+
+customer_cube = None
+# Built from customers-100.csv on the first /olap/customers request
 
 
 # ============================================================================
@@ -55,9 +118,12 @@ class TaskCreate(BaseModel):
     title: str
     # Task title (required, must be a string)
     
-    description: Optional[str] = None
+    description: Optional[str] = Field(None, max_length=300)
     # Task description (optional, defaults to None if not provided)
-    
+    # Same 300 character limit as TaskResponse, so a too long description is
+    # rejected here (422, or an "errors" entry in /tasks/bulk) instead of
+    # failing later when the stored TaskResponse is built
+
     completed: bool = False
     # Whether task is done (optional, defaults to False)
     
@@ -91,6 +157,17 @@ class TaskResponse(BaseModel):
 
 
 
+class TaskPatch(BaseModel):
+    """
+    Model for ONE item of a bulk update (PATCH /tasks/bulk)
+    Only the fields that are sent get changed
+    """
+    id: int
+    completed: Optional[bool] = None
+    priority: Optional[Literal["low", "medium", "high"]] = None
+
+
+
 @app.get("/")
 def read_root():
 
@@ -102,16 +179,67 @@ def read_root():
 # ----------------------------------------------------------------------------
 
 @app.get("/search")
-def search(q: str, limit: int = 10):
+def search(q: str, limit: int = Query(10, ge=1, le=100)):
+
+    results = []
+    for task_id, score in search_index.search(q, limit):
+        task = store.get(task_id)
+        if task is not None:
+            results.append({"id": task.id, "title": task.title, "score": round(score, 4)})
 
     return {
         "query": q,
         "limit": limit,
-        # List comprehension to generate fake results
-        "results": [f"Result {i} for '{q}'" for i in range(1, limit + 1)]
+        "results": results  # Best match first
     }
 
 
+# ----------------------------------------------------------------------------
+# OLAP REPORTS - counts from pre-aggregated cubes (see olap.py)
+# ----------------------------------------------------------------------------
+#   /olap/tasks?by=priority,completed
+#   /olap/tasks?by=priority,day&mode=rollup&where=completed:true
+#   /olap/customers?by=Country,month&mode=cube
+# mode: groupby (default), rollup (subtotals) or cube (every combination)
+# Rolled-up columns show up as "(all)".
+
+def olap_response(cube, by: str, mode: str, where: Optional[str]):
+    dimensions = [d.strip() for d in by.split(",") if d.strip()]
+    filters = {}
+    for part in (where or "").split(","):
+        if part.strip():
+            name, _, value = part.partition(":")
+            filters[name.strip()] = value.strip()
+    try:
+        frame = cube.query(dimensions, mode=mode, where=filters)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+    return Response(frame.to_json(orient="records"), media_type="application/json")
+
+
+@app.get("/olap/tasks")
+def olap_tasks(
+    by: str = "priority,completed",
+    mode: Literal["groupby", "rollup", "cube"] = "groupby",
+    where: Optional[str] = Query(None, description="Filters like completed:true,priority:high"),
+):
+
+    return olap_response(task_cube.cube, by, mode, where)
+
+
+@app.get("/olap/customers")
+def olap_customers(
+    by: str = "Country",
+    mode: Literal["groupby", "rollup", "cube"] = "groupby",
+    where: Optional[str] = Query(None, description="Filters like month:2021-05"),
+):
+
+    global customer_cube
+    if customer_cube is None:
+        customer_cube = customers_cube()
+    return olap_response(customer_cube, by, mode, where)
+
+
 # ----------------------------------------------------------------------------
 # CREATE TASK - POST endpoint
 # ----------------------------------------------------------------------------
@@ -123,25 +251,17 @@ def search(q: str, limit: int = 10):
 )
 def create_task(task: TaskCreate):
 
-    global task_id_counter
-    # 'global' keyword lets us modify the variable outside this function
-    # Without 'global', Python would create a NEW local variable instead
-    
     # Create a new TaskResponse object with all fields
     new_task = TaskResponse(
-        id=task_id_counter,         # Assign current counter value as ID
+        id=store.next_id(),         # Store hands out the next free ID
         title=task.title,           # Copy title from input
         description=task.description,  # Copy description (might be None)
         completed=task.completed,   # Copy completed status
         priority=task.priority      # Copy priority level
     )
     
-    # Increment counter for next task
-    task_id_counter += 1
-    # Now next task will get ID 2, then 3, etc.
-    
-    # Add the new task to our list
-    tasks.append(new_task)
+    # Add the new task to the store (also updates the indexes)
+    store.add(new_task)
     
     # Return the created task
     # FastAPI automatically converts this to JSON
@@ -149,15 +269,202 @@ def create_task(task: TaskCreate):
 
 
 # ----------------------------------------------------------------------------
-# GET ALL TASKS
+# BULK ENDPOINTS - create / update / delete many tasks in ONE request
+# ----------------------------------------------------------------------------
+#
+# The body can be either:
+#   - a JSON array:  [{"title": "a"}, {"title": "b"}]
+#   - NDJSON (Content-Type: application/x-ndjson), one JSON value per line.
+#     NDJSON is read as a stream, so huge uploads never sit in memory at once.
+# Items are handled in batches of BULK_BATCH_SIZE. A bad item does NOT abort
+# the batch - it shows up in "errors" with its position in the body.
+
+BULK_BATCH_SIZE = 1000
+
+
+async def iter_body_items(request: Request):
+    # Yields (index, parsed_item) or (index, ValueError) for unparsable lines
+    if "ndjson" in request.headers.get("content-type", ""):
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            # Last piece may be half a line, keep it for the next chunk
+            for line in lines:
+                if line.strip():
+                    yield index, parse_json_line(line)
+                    index += 1
+        if buffer.strip():
+            yield index, parse_json_line(buffer)
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array")
+    for index, item in enumerate(items):
+        yield index, item
+
+
+def parse_json_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+
+
+def item_error(index: int, error) -> dict:
+    # Turns a validation problem into something we can send back as JSON
+    if isinstance(error, ValidationError):
+        detail = error.errors(include_url=False, include_context=False, include_input=False)
+    else:
+        detail = str(error)
+    return {"index": index, "detail": detail}
+
+
+async def iter_batches(request: Request, model):
+    # Groups validated items into lists of BULK_BATCH_SIZE
+    # Yields (batch_of_(index, model_instance), errors)
+    batch, errors = [], []
+    async for index, item in iter_body_items(request):
+        try:
+            if isinstance(item, ValueError):
+                raise item
+            batch.append((index, model.model_validate(item)))
+        except (ValidationError, ValueError) as e:
+            errors.append(item_error(index, e))
+        if len(batch) == BULK_BATCH_SIZE:
+            yield batch, errors
+            batch, errors = [], []
+    if batch or errors:
+        yield batch, errors
+
+
+@app.post("/tasks/bulk")
+async def create_tasks_bulk(request: Request):
+
+    created_ids, errors = [], []
+    async for batch, batch_errors in iter_batches(request, TaskCreate):
+        errors.extend(batch_errors)
+        # One block of ids for the whole batch instead of one counter bump per task
+        ids = store.reserve_ids(len(batch))
+        new_tasks = [
+            TaskResponse(id=task_id, **task.model_dump())
+            for task_id, (_, task) in zip(ids, batch)
+        ]
+        store.add_many(new_tasks)
+        created_ids.extend(ids)
+
+    return {"created": len(created_ids), "ids": created_ids, "errors": errors}
+
+
+@app.patch("/tasks/bulk")
+async def update_tasks_bulk(request: Request):
+
+    updated, errors = 0, []
+    async for batch, batch_errors in iter_batches(request, TaskPatch):
+        errors.extend(batch_errors)
+        for index, patch in batch:
+            # Same store methods as the single task routes, so indexes stay correct
+            task = store.get(patch.id)
+            if patch.completed is not None:
+                task = store.set_completed(patch.id, patch.completed)
+            if patch.priority is not None:
+                task = store.set_priority(patch.id, patch.priority)
+            if task is None:
+                errors.append(item_error(index, f"Task {patch.id} not found"))
+            else:
+                updated += 1
+
+    return {"updated": updated, "errors": errors}
+
+
+@app.delete("/tasks/bulk")
+async def delete_tasks_bulk(request: Request):
+
+    # Items are plain ids: [1, 2, 3] (or one id per NDJSON line)
+    deleted, errors = 0, []
+    async for index, item in iter_body_items(request):
+        if isinstance(item, ValueError):
+            errors.append(item_error(index, item))
+        elif isinstance(item, bool) or not isinstance(item, int):
+            errors.append(item_error(index, f"Expected a task id, got {item!r}"))
+        elif store.delete(item) is None:
+            errors.append(item_error(index, f"Task {item} not found"))
+        else:
+            deleted += 1
+
+    return {"deleted": deleted, "errors": errors}
+
+
+# ----------------------------------------------------------------------------
+# PAGINATION HELPERS (shared by all the task list endpoints)
+# ----------------------------------------------------------------------------
+#
+# List endpoints return ONE PAGE at a time:
+#   ?limit=100       -> how many tasks per page (max 1000)
+#   ?cursor=250      -> give me tasks with id > 250 (the last id I already have)
+#   ?fields=id,title -> only send these columns
+# If there are more results, the X-Next-Cursor response header holds the
+# cursor for the next page. No header = last page.
+
+MAX_PAGE_SIZE = 1000
+TASK_FIELDS = list(TaskResponse.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    # "id, title" -> ["id", "title"], None means "all fields"
+    if fields is None:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in TASK_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid fields {unknown}. Must be from: {TASK_FIELDS}"
+        )
+    return selected
+
+
+def page_response(page, next_cursor: Optional[int], fields: Optional[List[str]]):
+    # Build the JSON ourselves: the tasks are already valid TaskResponse objects,
+    # so running them through response_model again would only waste time
+    if fields is None:
+        rows = [task.model_dump() for task in page]
+    else:
+        rows = [{f: getattr(task, f) for f in fields} for task in page]
+
+    headers = {}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    return JSONResponse(content=rows, headers=headers)
+
+
+# ----------------------------------------------------------------------------
+# GET ALL TASKS (with optional filters)
 # ----------------------------------------------------------------------------
 
 @app.get("/tasks", response_model=List[TaskResponse])
-def get_all_tasks():
+def get_all_tasks(
+    request: Request,
+    completed: Optional[bool] = None,
+    priority: Optional[Literal["low", "medium", "high"]] = None,
+    cursor: int = Query(0, ge=0, description="Return tasks with id greater than this"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma separated list of fields"),
+):
+
+    # Filters can be combined: /tasks?completed=false&priority=high
+    def build():
+        page, next_cursor = store.query(
+            completed=completed, priority=priority, after=cursor, limit=limit
+        )
+        return page_response(page, next_cursor, parse_fields(fields))
 
-    return tasks
-    # Simply return the entire tasks list
-    # FastAPI handles converting it to JSON
+    return list_cache.respond(request, store.version, build)
 
 
 # ----------------------------------------------------------------------------
@@ -165,25 +472,20 @@ def get_all_tasks():
 # ----------------------------------------------------------------------------
 
 @app.get("/tasks/completed", response_model=List[TaskResponse])
-def get_completed_tasks():
+def get_completed_tasks(
+    request: Request,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+):
 
-    completed_list = []
-    # Create empty list to collect completed tasks
-    
-    # Loop through ALL tasks
-    for pakadneka in tasks:
-        # pakadneka = one task object from the list
-        # (you named it "pakadneka" which means "to catch/grab" - creative! 😄)
-        
-        if pakadneka.completed:
-            # If this task's completed field is True
-            # Note: We use .completed (object property), NOT ["completed"] (dict key)
-            
-            completed_list.append(pakadneka)
-            # Add this task to our results list
-    
-    return completed_list
-    # Return all completed tasks we found
+    def build():
+        page, next_cursor = store.query(completed=True, after=cursor, limit=limit)
+        # The store keeps a list of completed ids, so we only touch
+        # the completed tasks instead of looping over ALL tasks
+        return page_response(page, next_cursor, parse_fields(fields))
+
+    return list_cache.respond(request, store.version, build)
 
 
 # ----------------------------------------------------------------------------
@@ -191,7 +493,13 @@ def get_completed_tasks():
 # ----------------------------------------------------------------------------
 
 @app.get("/tasks/priority/{priority_level}", response_model=List[TaskResponse])
-def get_tasks_by_priority(priority_level: str):
+def get_tasks_by_priority(
+    request: Request,
+    priority_level: str,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+):
 
     
     # List of valid priority values
@@ -208,22 +516,30 @@ def get_tasks_by_priority(priority_level: str):
             detail=f"Invalid priority. Must be one of: {valid_priorities}"
         )
     
-    # Create empty list to collect matching tasks
-    priority_list = []
-    
-    # Loop through all tasks
-    for pakadneka in tasks:
-        # Compare priorities (case-insensitive)
-        if pakadneka.priority.lower() == priority_level.lower():
-            # Both converted to lowercase for comparison
-            # So "High" == "high" works!
-            
-            priority_list.append(pakadneka)
-            # Add matching task to results
-    
-    return priority_list
-    # Return all tasks with matching priority
+    def build():
+        page, next_cursor = store.query(
+            priority=priority_level.lower(), after=cursor, limit=limit
+        )
+        # Return one page of tasks with matching priority (from the priority index)
+        return page_response(page, next_cursor, parse_fields(fields))
+
+    return list_cache.respond(request, store.version, build)
+
+
+
+# ----------------------------------------------------------------------------
+# EXPORT ALL TASKS (SPECIFIC ROUTE - MUST BE BEFORE /{task_id})
+# ----------------------------------------------------------------------------
+
+@app.get("/tasks/export")
+def export_tasks(format: Literal["ndjson", "json"] = "ndjson"):
 
+    # Streams every task in chunks, so the first bytes go out right away
+    # and we never hold the whole serialized export in memory
+    return StreamingResponse(
+        iter_export(store, export_cache, format),
+        media_type=EXPORT_MEDIA_TYPES[format]
+    )
 
 
 @app.get("/tasks/{task_id}", response_model=TaskResponse)
@@ -232,23 +548,17 @@ def get_task_by_id(
 ):
 
     
-    # Search through all tasks
-    for task in tasks:
-        # task = current task we're examining
-        
-        if task.id == task_id:
-            # Does this task's ID match what we're looking for?
-            # Using .id (object property), not ["id"] (dict key)
-            
-            return task
-            # Found it! Return immediately (exits function)
+    # Direct lookup by id - no loop needed
+    task = store.get(task_id)
     
-    # If we reach here, loop finished without finding the task
-    # Raise 404 Not Found error
-    raise HTTPException(
-        status_code=404,  # 404 = Not Found
-        detail="Task not found"
-    )
+    if task is None:
+        # Raise 404 Not Found error
+        raise HTTPException(
+            status_code=404,  # 404 = Not Found
+            detail="Task not found"
+        )
+    
+    return task
 
 
 # ----------------------------------------------------------------------------
@@ -258,24 +568,19 @@ def get_task_by_id(
 @app.put("/tasks/{task_id}/complete", response_model=TaskResponse)
 def complete_task(task_id: int):
   
-    # Search for the task
-    for pakadneka in tasks:
-        if pakadneka.id == task_id:
-            # Found the task!
-            
-            pakadneka.completed = True
-            # Change completed property to True
-            # This modifies the actual object in the tasks list
-            
-            return pakadneka
-            # Return the updated task
+    # Go through the store so the completed index stays correct
+    # (changing task.completed directly would leave the index stale)
+    task = store.set_completed(task_id, True)
     
-    # Task not found - raise 404 error
-    # IMPORTANT: This is OUTSIDE the loop (proper indentation!)
-    raise HTTPException(
-        status_code=404, 
-        detail="Task not found"
-    )
+    if task is None:
+        # Task not found - raise 404 error
+        raise HTTPException(
+            status_code=404, 
+            detail="Task not found"
+        )
+    
+    return task
+    # Return the updated task
 
 
 # ----------------------------------------------------------------------------
@@ -289,23 +594,18 @@ def update_task_priority(
 ):
  
     
-    # Search for the task
-    for pakadneka in tasks:
-        if pakadneka.id == task_id:
-            # Found it!
-            
-            pakadneka.priority = priority
-            # Update the priority property
-            
-            return pakadneka
-            # Return updated task
+    # Update through the store so the priority index moves the task too
+    task = store.set_priority(task_id, priority)
     
-    # Task not found
-    # IMPORTANT: Outside the loop!
-    raise HTTPException(
-        status_code=404, 
-        detail="Task not found"
-    )
+    if task is None:
+        # Task not found
+        raise HTTPException(
+            status_code=404, 
+            detail="Task not found"
+        )
+    
+    return task
+    # Return updated task
 
 
 # ----------------------------------------------------------------------------
@@ -314,18 +614,9 @@ def update_task_priority(
 
 @app.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_task(task_id: int):
-    global tasks
-    # Need 'global' because we're reassigning the entire tasks list
-    
-    # Remember how many tasks we have before deletion
-    initial_length = len(tasks)
-    
-    # List comprehension to keep all tasks EXCEPT the one we're deleting
-    tasks = [t for t in tasks if t.id != task_id]
-    # Translation: "Keep task 't' only if its id is NOT the one we're deleting"
-    
-    # Check if anything was actually removed
-    if len(tasks) == initial_length:
+
+    # Removes the task and its index entries (no rebuilding the whole list)
+    if store.delete(task_id) is None:
         raise HTTPException(
             status_code=404, 
             detail="Task not found"
@@ -1,9 +1,165 @@
-from fastapi import FastAPI, Request, Response
+# ============================================================================
+# METRICS MIDDLEWARE - How long does every route take?
+# ============================================================================
+#
+# For every request we record:
+#   - latency, in a histogram per (method, route, status)
+#   - how many requests are running right now (in-flight gauge)
+#   - bytes received and bytes sent per (method, route)
+# GET /metrics shows it all in the Prometheus text format.
+#
+# Usage (see main.py):
+#   install_metrics(app)
+#
+# This is a plain ASGI middleware instead of @app.middleware("http"):
+# the decorator version wraps every request and response in extra objects,
+# which costs tens of microseconds per request, and we want the timing
+# itself to stay in the single-digit microsecond range.
+# Measure it with:  python -m benchmarks.bench_middleware
+
 import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from fastapi import FastAPI, Response
+
+# Upper bounds of the latency buckets, in seconds (Prometheus style)
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+UNMATCHED_ROUTE = "<unmatched>"
+# 404s get one label instead of one per random URL someone tried
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: recording a value is one bisect + two additions
+    """
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)  # last one = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    All the numbers the middleware collects
+    Only touched from the event loop, so no locks are needed
+    """
+
+    def __init__(self):
+        self.latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.request_bytes: Dict[Tuple[str, str], int] = {}
+        self.response_bytes: Dict[Tuple[str, str], int] = {}
+        self.in_flight = 0
+
+    def record(self, method, route, status, seconds, received, sent) -> None:
+        key = (method, route, str(status))
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(seconds)
+
+        route_key = (method, route)
+        self.request_bytes[route_key] = self.request_bytes.get(route_key, 0) + received
+        self.response_bytes[route_key] = self.response_bytes.get(route_key, 0) + sent
+
+    def render(self) -> str:
+        # Prometheus text format: https://prometheus.io/docs/instrumenting/exposition_formats/
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route and status",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{route}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.total}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        for name, values, help_text in (
+            ("http_request_size_bytes_total", self.request_bytes, "Request body bytes received"),
+            ("http_response_size_bytes_total", self.response_bytes, "Response body bytes sent"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, route), total in sorted(values.items()):
+                lines.append(f'{name}{{method="{method}",route="{route}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times every HTTP request and counts its bytes
+    """
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        received = 0
+        sent = 0
+        status = 500  # if the app crashes before sending anything
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal sent, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight -= 1
+            # The router puts the matched route into the scope,
+            # so we get "/tasks/{task_id}" instead of "/tasks/42"
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            metrics.record(scope["method"], route_path, status, elapsed, received, sent)
+
 
-app =  FastAPI()
+def install_metrics(app: FastAPI, path: str = "/metrics") -> Metrics:
+    """
+    Adds the middleware and the GET /metrics endpoint to `app`
+    """
+    metrics = Metrics()
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
 
-# call_next to call the next endpoint
-@app.middleware("http")
-async def log_request_time(request: Request, call_next):
+    @app.get(path, include_in_schema=False)
+    async def get_metrics():
+        return Response(metrics.render(), media_type="text/plain; version=0.0.4")
 
+    return metrics
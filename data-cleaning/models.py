@@ -1,8 +1,6 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy import Column, Integer, String
 from database import Base
-from sqlalchemy import Boolean, DateTime
+from sqlalchemy import Boolean, DateTime, Index
 from sqlalchemy.sql import func
 
 class Task(Base):
@@ -18,13 +16,15 @@ class Task(Base):
                      nullable = False
                  )
     description = Column(String,
-                           nullable = False
+                           nullable = True
                        )
     priority = Column(String,
-                        nullable = False
+                        nullable = False,
+                        default = "medium"
                     )
     
     completed = Column(Boolean, 
+                        nullable = False,
                         default = False
                     )
     created_at = Column(DateTime(timezone = True),
@@ -38,6 +38,13 @@ class Task(Base):
                     )
       # updated_at: DateTime column with timezone
 
+    __table_args__ = (
+        # Filtered list queries (WHERE completed = ? AND priority = ? AND id > ?
+        # ORDER BY id) are answered straight from these indexes
+        Index("ix_afraa_completed_priority_id", "completed", "priority", "id"),
+        Index("ix_afraa_priority_id", "priority", "id"),
+    )
+
 
 # tasks table:
 # ┌────┬───────────┬─────────────┬───────────┬──────────┬────────────┬────────────┐
@@ -1 +1,267 @@
+# ============================================================================
+# OLAP - Pre-aggregated cubes for fast "count by X and Y" reports
+# ============================================================================
+#
+# Instead of looping over raw rows for every report, we keep a CUBE: one
+# NumPy array with one axis per dimension, e.g.
+#     counts[priority, completed, day]
+# Each dimension is dictionary-encoded: "high" -> 0, "low" -> 1, ... so a
+# row becomes a tuple of small ints, i.e. a cell in the array.
+#
+# Adding rows = bincount of their cell numbers (vectorized, no Python loop).
+# Asking "count by priority" = sum the array over the other axes.
+# New values just grow the array along their axis.
+#
+#   cube = Cube(["Country", "month"])
+#   cube.add_frame(df)
+#   cube.groupby(["Country"])      -> DataFrame with Country, count
+#   cube.rollup(["Country", "month"])  (SQL ROLLUP: subtotals + grand total)
+#   cube.cube(["Country", "month"])    (SQL CUBE: every combination)
+
+import threading
+from datetime import date
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
 import pandas as pd
+
+from columnar import CUSTOMERS_CSV, CUSTOMERS_SCHEMA, load_csv
+
+ALL = "(all)"
+# Label used for rolled-up dimensions in rollup() / cube() results
+
+
+class Dimension:
+    """
+    Dictionary encoding of one column: value <-> code (0, 1, 2, ...)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.values: List = []
+        self._codes: Dict = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value) -> Optional[int]:
+        # Code of an existing value; also accepts its text form ("true", "2021")
+        # because values coming from a URL are always strings
+        code = self._codes.get(value)
+        if code is None:
+            text = str(value).lower()
+            for i, known in enumerate(self.values):
+                if str(known).lower() == text:
+                    return i
+        return code
+
+    def encode(self, column) -> np.ndarray:
+        # Vectorized: only the distinct values go through the dictionary
+        inverse, uniques = pd.factorize(pd.Series(column), use_na_sentinel=False)
+        lookup = np.array([self.code(value) for value in uniques], dtype=np.int64)
+        return lookup[inverse]
+
+
+class Cube:
+    """
+    Dense count (+ optional sums) array over dictionary-encoded dimensions
+    """
+
+    def __init__(self, dimensions: Sequence[str], measures: Sequence[str] = ()):
+        self.dimensions = [Dimension(name) for name in dimensions]
+        self.measures = list(measures)
+        self._shape = tuple(0 for _ in self.dimensions)
+        self.counts = np.zeros(self._shape, dtype=np.int64)
+        self.sums = {m: np.zeros(self._shape, dtype=np.float64) for m in self.measures}
+        self._lock = threading.RLock()
+
+    def _axis(self, name: str) -> int:
+        for i, dimension in enumerate(self.dimensions):
+            if dimension.name == name:
+                return i
+        raise KeyError(f"Unknown dimension {name!r}. Must be one of: {self.dimension_names}")
+
+    @property
+    def dimension_names(self) -> List[str]:
+        return [d.name for d in self.dimensions]
+
+    def _grow(self) -> None:
+        # A dimension got new values -> pad the arrays along that axis
+        shape = tuple(len(d) for d in self.dimensions)
+        if shape == self._shape:
+            return
+        padding = [(0, new - old) for old, new in zip(self._shape, shape)]
+        self.counts = np.pad(self.counts, padding)
+        self.sums = {m: np.pad(array, padding) for m, array in self.sums.items()}
+        self._shape = shape
+
+    # ------------------------------------------------------------------
+    # Loading data (incremental)
+    # ------------------------------------------------------------------
+
+    def add_frame(self, frame: pd.DataFrame, sign: int = 1) -> None:
+        """
+        Adds (sign=1) or removes (sign=-1) many rows at once
+        `frame` needs a column per dimension and per measure
+        """
+        if len(frame) == 0:
+            return
+        with self._lock:
+            codes = [d.encode(frame[d.name].to_numpy()) for d in self.dimensions]
+            self._grow()
+            size = self.counts.size
+            cells = np.ravel_multi_index(codes, self._shape)
+            self.counts += sign * np.bincount(cells, minlength=size).reshape(self._shape)
+            for m in self.measures:
+                weights = frame[m].to_numpy(dtype=np.float64)
+                self.sums[m] += sign * np.bincount(cells, weights=weights, minlength=size).reshape(self._shape)
+
+    def add_row(self, values: Dict, sign: int = 1) -> None:
+        # One row (e.g. one task changed) - a single cell update, no bincount
+        with self._lock:
+            codes = tuple(d.code(values[d.name]) for d in self.dimensions)
+            self._grow()
+            self.counts[codes] += sign
+            for m in self.measures:
+                self.sums[m][codes] += sign * values[m]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def groupby(self, by: Sequence[str], where: Optional[Dict] = None) -> pd.DataFrame:
+        """
+        Count (and sums) grouped by the `by` dimensions
+        where={"priority": "high"} keeps only that slice first
+        """
+        with self._lock:
+            counts = self.counts
+            sums = dict(self.sums)
+            index = [slice(None)] * len(self.dimensions)
+            for name, value in (where or {}).items():
+                axis = self._axis(name)
+                code = self.dimensions[axis].lookup(value)
+                if code is None:
+                    return self._empty(by)
+                index[axis] = slice(code, code + 1)
+            counts = counts[tuple(index)]
+            sums = {m: array[tuple(index)] for m, array in sums.items()}
+
+            keep = [self._axis(name) for name in by]
+            drop = tuple(i for i in range(len(self.dimensions)) if i not in keep)
+            # Rollup = sum over the dimensions we don't group by
+            counts = counts.sum(axis=drop)
+            sums = {m: array.sum(axis=drop) for m, array in sums.items()}
+
+            # Put the remaining axes in the order the caller asked for
+            order = np.argsort(np.argsort(keep))
+            counts = np.transpose(counts, order) if keep else counts
+            sums = {m: (np.transpose(a, order) if keep else a) for m, a in sums.items()}
+
+            cells = np.nonzero(counts) if keep else ()
+            result = {}
+            for name, axis_codes in zip(by, cells):
+                values = np.asarray(self.dimensions[self._axis(name)].values, dtype=object)
+                result[name] = values[axis_codes]
+            if keep:
+                result["count"] = counts[cells]
+                for m, array in sums.items():
+                    result[m] = array[cells]
+            else:
+                result["count"] = [int(counts)]
+                for m, array in sums.items():
+                    result[m] = [float(array)]
+        return pd.DataFrame(result)
+
+    def _empty(self, by: Sequence[str]) -> pd.DataFrame:
+        return pd.DataFrame(columns=[*by, "count", *self.measures])
+
+    def rollup(self, by: Sequence[str], where: Optional[Dict] = None) -> pd.DataFrame:
+        # Like SQL GROUP BY ROLLUP(a, b): (a, b), (a), () - subtotals as ALL
+        frames = [self._labelled(by[:k], by, where) for k in range(len(by), -1, -1)]
+        return pd.concat(frames, ignore_index=True)
+
+    def cube(self, by: Sequence[str], where: Optional[Dict] = None) -> pd.DataFrame:
+        # Like SQL GROUP BY CUBE(a, b): every subset of the dimensions
+        frames = [
+            self._labelled(list(subset), by, where)
+            for k in range(len(by), -1, -1)
+            for subset in combinations(by, k)
+        ]
+        return pd.concat(frames, ignore_index=True)
+
+    def _labelled(self, subset: Sequence[str], by: Sequence[str], where: Optional[Dict]) -> pd.DataFrame:
+        frame = self.groupby(subset, where)
+        for name in by:
+            if name not in subset:
+                frame[name] = ALL
+        return frame[[*by, "count", *self.measures]]
+
+    def query(self, by: Sequence[str], mode: str = "groupby", where: Optional[Dict] = None) -> pd.DataFrame:
+        if mode == "rollup":
+            return self.rollup(by, where)
+        if mode == "cube":
+            return self.cube(by, where)
+        return self.groupby(by, where)
+
+
+# ============================================================================
+# TASK CUBE - priority x completed x day, kept up to date by the TaskStore
+# ============================================================================
+
+class TaskCube:
+    """
+    Subscribe on_change to the TaskStore
+    Tasks in main.py don't store a created_at, so "day" is the day the task
+    was added to the store
+    """
+
+    DIMENSIONS = ("priority", "completed", "day")
+
+    def __init__(self):
+        self.cube = Cube(self.DIMENSIONS)
+        self._cells: Dict[int, Dict] = {}  # task id -> the cell it's counted in
+
+    def on_change(self, event: str, task) -> None:
+        old = self._cells.pop(task.id, None)
+        if old is not None:
+            self.cube.add_row(old, sign=-1)
+        if event == "delete":
+            return
+        cell = {
+            "priority": task.priority,
+            "completed": task.completed,
+            "day": old["day"] if old else date.today().isoformat(),
+        }
+        self.cube.add_row(cell)
+        self._cells[task.id] = cell
+
+
+# ============================================================================
+# CUSTOMER CUBE - Country x subscription month from customers-100.csv
+# ============================================================================
+
+CUSTOMER_DIMENSIONS = ("Country", "month")
+# The cube is dense: its size is the product of the dimension sizes. Country x
+# month stays small; a nearly unique column like City would make it grow with
+# the number of rows, so that kind of report belongs in a plain groupby
+
+
+def customers_cube(path=CUSTOMERS_CSV, chunksize: int = 100_000) -> Cube:
+    # Columns come memory-mapped from the columnar cache (dates already parsed)
+    # and go into the cube in slices, so big files never sit in memory at once
+    cube = Cube(CUSTOMER_DIMENSIONS)
+    frame = load_csv(path, CUSTOMERS_SCHEMA, columns=["Country", "Subscription Date"])
+    for start in range(0, len(frame), chunksize):
+        chunk = frame.iloc[start:start + chunksize].copy()
+        chunk["month"] = chunk["Subscription Date"].dt.strftime("%Y-%m")
+        cube.add_frame(chunk)
+    return cube
@@ -0,0 +1,238 @@
+# ============================================================================
+# REQUEST PROFILING - See where ONE slow request spends its time / memory
+# ============================================================================
+#
+# Switched off unless the PROFILE_TOKEN environment variable is set. When it
+# is off the middleware is not even installed, so normal requests pay nothing.
+#
+# With PROFILE_TOKEN=secret a request is profiled when it carries
+#   header  X-Profile: secret        or   query  ?__profile=secret
+# and PROFILE_SAMPLE_RATE (0.0 - 1.0, default 0) profiles that fraction of
+# all other requests at random.
+#
+# What gets recorded (X-Profile-Mode header / ?__profile_mode=, default cpu):
+#   cpu    -> cProfile, kept as pstats text + the raw .prof file
+#   memory -> tracemalloc, top allocation sites during the request
+#   both   -> both of the above
+#
+# The last PROFILE_BUFFER_SIZE profiles stay in memory (a ring buffer) and can
+# be read back through the admin endpoints (same token required):
+#   GET /admin/profiles              -> list
+#   GET /admin/profiles/{id}         -> pstats / tracemalloc text
+#   GET /admin/profiles/{id}/pstats  -> raw .prof (snakeviz, flameprof, ...)
+#
+# The admin endpoints themselves are never profiled (they carry the token
+# too, and would push real profiles out of the buffer).
+#
+# Only one request is profiled at a time (cProfile and tracemalloc are global);
+# requests arriving meanwhile don't get a profile of their own. They are NOT
+# kept out of the running one though: cProfile records everything on the
+# event loop thread, so async requests served concurrently show up in it
+# (and tracemalloc counts their allocations). Profile on a quiet server for
+# clean numbers. On Python < 3.12 cProfile only sees the event loop thread,
+# so plain `def` routes show up as time spent waiting for the threadpool;
+# Python 3.12+ profiles every thread.
+
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Optional
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, HTTPException, Request, Response
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+PROFILE_TOP_N = 40
+PROFILE_MODES = ("cpu", "memory", "both")
+ADMIN_PREFIX = "/admin/profiles"
+
+
+class ProfileBuffer:
+    """
+    Ring buffer of finished profiles (oldest are dropped first)
+    """
+
+    def __init__(self, size: int = PROFILE_BUFFER_SIZE):
+        self._profiles = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profile: dict) -> None:
+        with self._lock:
+            profile["id"] = next(self._ids)
+            self._profiles.append(profile)
+
+    def list(self):
+        with self._lock:
+            return [
+                {k: v for k, v in p.items() if k not in ("cpu", "memory", "pstats")}
+                for p in reversed(self._profiles)
+            ]
+
+    def get(self, profile_id: int) -> Optional[dict]:
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        return None
+
+
+def format_pstats(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+    return out.getvalue()
+
+
+def format_tracemalloc(snapshot: tracemalloc.Snapshot) -> str:
+    lines = []
+    for stat in snapshot.statistics("lineno")[:PROFILE_TOP_N]:
+        lines.append(str(stat))
+    return "\n".join(lines)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles flagged or sampled requests
+    """
+
+    def __init__(self, app, buffer: ProfileBuffer, token: str, sample_rate: float = 0.0):
+        self.app = app
+        self.buffer = buffer
+        self.token = token
+        self.sample_rate = sample_rate
+        self._busy = threading.Lock()
+
+    def _requested_mode(self, scope) -> Optional[str]:
+        # Returns the profiling mode for this request, or None = don't profile
+        if scope["path"].startswith(ADMIN_PREFIX):
+            return None
+        headers = dict(scope["headers"])
+        query = parse_qs(scope.get("query_string", b"").decode()) if scope.get("query_string") else {}
+
+        flagged = (
+            headers.get(b"x-profile", b"").decode() == self.token
+            or query.get("__profile", [None])[0] == self.token
+        )
+        if not flagged and not (self.sample_rate and random.random() < self.sample_rate):
+            return None
+
+        mode = headers.get(b"x-profile-mode", b"").decode() or query.get("__profile_mode", ["cpu"])[0]
+        return mode if mode in PROFILE_MODES else "cpu"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._requested_mode(scope)
+        if mode is None or not self._busy.acquire(blocking=False):
+            # Not asked for, or another request is being profiled right now
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        profiler = cProfile.Profile() if mode in ("cpu", "both") else None
+        trace_memory = mode in ("memory", "both") and not tracemalloc.is_tracing()
+        try:
+            if trace_memory:
+                tracemalloc.start()
+            if profiler is not None:
+                profiler.enable()
+            start = time.perf_counter()
+            try:
+                await self.app(scope, receive, status_send)
+            finally:
+                elapsed = time.perf_counter() - start
+                if profiler is not None:
+                    profiler.disable()
+                snapshot = tracemalloc.take_snapshot() if trace_memory else None
+                peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+                if trace_memory:
+                    tracemalloc.stop()
+        finally:
+            self._busy.release()
+
+        profile = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "mode": mode,
+            "duration_ms": round(elapsed * 1000, 3),
+            "started_at": time.time() - elapsed,
+        }
+        if profiler is not None:
+            profiler.create_stats()
+            # Dump before format_pstats: pstats.Stats takes the stats out of the profiler
+            profile["pstats"] = marshal.dumps(profiler.stats)
+            profile["cpu"] = format_pstats(profiler)
+        if snapshot is not None:
+            profile["memory"] = f"peak traced memory: {peak} bytes\n" + format_tracemalloc(snapshot)
+            profile["peak_memory_bytes"] = peak
+        self.buffer.add(profile)
+
+
+def install_profiling(app: FastAPI, token: Optional[str] = PROFILE_TOKEN) -> Optional[ProfileBuffer]:
+    """
+    Adds the profiling middleware and /admin/profiles endpoints to `app`
+    Does nothing (and returns None) when no token is configured
+    """
+    if not token:
+        return None
+
+    buffer = ProfileBuffer()
+    app.add_middleware(ProfilingMiddleware, buffer=buffer, token=token, sample_rate=PROFILE_SAMPLE_RATE)
+
+    def check_token(request: Request) -> None:
+        if request.headers.get("x-profile") != token:
+            raise HTTPException(status_code=403, detail="Missing or wrong X-Profile token")
+
+    @app.get(ADMIN_PREFIX, include_in_schema=False)
+    def list_profiles(request: Request):
+        check_token(request)
+        return buffer.list()
+
+    @app.get(ADMIN_PREFIX + "/{profile_id}", include_in_schema=False)
+    def get_profile(profile_id: int, request: Request):
+        check_token(request)
+        profile = buffer.get(profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        parts = [f"{profile['method']} {profile['path']} -> {profile['status']} "
+                 f"in {profile['duration_ms']} ms"]
+        if "cpu" in profile:
+            parts.append(profile["cpu"])
+        if "memory" in profile:
+            parts.append(profile["memory"])
+        return Response("\n\n".join(parts), media_type="text/plain")
+
+    @app.get(ADMIN_PREFIX + "/{profile_id}/pstats", include_in_schema=False)
+    def download_pstats(profile_id: int, request: Request):
+        check_token(request)
+        profile = buffer.get(profile_id)
+        if profile is None or "pstats" not in profile:
+            raise HTTPException(status_code=404, detail="No cProfile data for this profile")
+        return Response(
+            profile["pstats"],
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'},
+        )
+
+    return buffer
@@ -0,0 +1,108 @@
+# ============================================================================
+# RESPONSE CACHE - ETag / If-None-Match for the task list endpoints
+# ============================================================================
+#
+# Dashboards poll GET /tasks every few seconds even when nothing changed.
+# We keep the finished JSON body of each (path + query) and reuse it while
+# the store version is the same, so a repeated poll skips the query and the
+# serialization.
+#
+# Every response also gets an ETag (a hash of the body). When the client
+# sends it back in If-None-Match and the body is still the same, we answer
+# 304 Not Modified with no body at all.
+#
+# Memory is bounded: least recently used entries are dropped once there are
+# more than max_entries of them or they take more than max_bytes.
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+
+
+class CachedResponse(NamedTuple):
+    version: int
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    # W/"abc" (weak) matches "abc" too for GET requests
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+    """
+    LRU cache of finished JSON responses, valid for one store version
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key_for(request: Request) -> Tuple:
+        # Same route + same query parameters (in any order) -> same key
+        return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+    def get(self, key: Tuple, version: int) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(key)  # mark as recently used
+            return entry
+
+    def put(self, key: Tuple, version: int, response: Response) -> CachedResponse:
+        body = bytes(response.body)
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.startswith("x-")  # e.g. X-Next-Cursor
+        }
+        entry = CachedResponse(version, make_etag(body), body, headers)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            if len(body) <= self.max_bytes:
+                self._entries[key] = entry
+                self._bytes += len(body)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+        return entry
+
+    def respond(self, request: Request, version: int, build: Callable[[], Response]) -> Response:
+        """
+        Cached (or freshly built) response for this request
+        build() is only called on a cache miss
+        """
+        key = self.key_for(request)
+        entry = self.get(key, version)
+        if entry is None:
+            entry = self.put(key, version, build())
+
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request, entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
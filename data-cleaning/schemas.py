@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Literal
 from datetime import datetime
 
@@ -45,8 +45,7 @@ class TaskResponse(TaskBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        # orm_mode allows Pydantic to work with SQLAlchemy models
-        # It can read data from objects (not just dicts)
-        orm_mode = True
+    # from_attributes (called orm_mode in Pydantic v1) allows Pydantic to work
+    # with SQLAlchemy models. It can read data from objects (not just dicts)
+    model_config = ConfigDict(from_attributes=True)
         
\ No newline at end of file
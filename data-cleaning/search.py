@@ -0,0 +1,153 @@
+# ============================================================================
+# SEARCH INDEX - Full-text search over task title + description
+# ============================================================================
+#
+# An inverted index maps every word to the tasks that contain it:
+#   "milk" -> {1: 2, 7: 1}     (task id -> how many times the word appears)
+#
+# A query only looks at the tasks listed under its words, so we never rescan
+# every task. Results are ranked with BM25 (the classic search engine score):
+# rare words count more than common ones, and matches in short texts count
+# more than matches in long ones.
+#
+# The last word of the query also matches as a PREFIX ("buy mi" finds
+# "buy milk"), using a sorted list of all known words + binary search.
+#
+# The index subscribes to the TaskStore, so it updates itself whenever a
+# task is created, changed or deleted.
+
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, List, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_PREFIX_EXPANSIONS = 50
+
+# BM25 tuning knobs (standard values)
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    # "Buy MILK, eggs!" -> ["buy", "milk", "eggs"]
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def task_text(task) -> str:
+    return f"{task.title} {task.description or ''}"
+
+
+class SearchIndex:
+    """
+    In-memory inverted index with BM25 ranking
+    Subscribe on_change to the TaskStore to keep it up to date
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}  # word -> {task id: count}
+        self._doc_terms: Dict[int, Counter] = {}        # task id -> word counts
+        self._doc_length: Dict[int, int] = {}           # task id -> number of words
+        self._doc_text: Dict[int, str] = {}             # to skip re-indexing unchanged text
+        self._terms: List[str] = []                     # sorted vocabulary for prefix search
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    # ------------------------------------------------------------------
+    # Keeping the index up to date
+    # ------------------------------------------------------------------
+
+    def on_change(self, event: str, task) -> None:
+        if event == "delete":
+            self.remove(task.id)
+        else:
+            self.add(task.id, task_text(task))
+
+    def add(self, doc_id: int, text: str) -> None:
+        with self._lock:
+            if self._doc_text.get(doc_id) == text:
+                # Only completed / priority changed -> nothing to re-index
+                return
+            self._remove(doc_id)
+
+            counts = Counter(tokenize(text))
+            for term, count in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    insort(self._terms, term)
+                postings[doc_id] = count
+            self._doc_terms[doc_id] = counts
+            self._doc_text[doc_id] = text
+            self._doc_length[doc_id] = sum(counts.values())
+            self._total_length += self._doc_length[doc_id]
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        counts = self._doc_terms.pop(doc_id, None)
+        if counts is None:
+            return
+        del self._doc_text[doc_id]
+        self._total_length -= self._doc_length.pop(doc_id)
+        for term in counts:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                # Nobody uses this word anymore -> drop it from the vocabulary
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        # All words starting with `prefix`, found by binary search
+        start = bisect_left(self._terms, prefix)
+        matches = []
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        Returns up to `limit` (task id, score) pairs, best match first
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if n_docs == 0:
+                return []
+            avg_length = self._total_length / n_docs
+
+            terms = set(words[:-1])
+            terms.update(self._expand_prefix(words[-1]))
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self._doc_length[doc_id]
+                    norm = tf + K1 * (1 - B + B * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / norm
+
+        # Heap keeps only the best `limit` results instead of sorting everything
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,195 @@
+# ============================================================================
+# TASK STORE - In-memory tasks with indexes (replaces the plain `tasks` list)
+# ============================================================================
+#
+# The old version kept every task in one Python list, so finding a task by id
+# meant looping over ALL tasks (O(n)) and deleting rebuilt the whole list.
+#
+# This store keeps:
+#   _by_id        -> dict {id: task}              (primary index, O(1) lookups)
+#   _ids          -> sorted list of every id      (ordered listing)
+#   _by_completed -> {True: [ids], False: [ids]}  (secondary index)
+#   _by_priority  -> {"low": [ids], ...}          (secondary index)
+#
+# The id lists are kept SORTED so results come back in id order (same order
+# the old list had) and later we can jump to "ids after X" with bisect.
+# New ids are almost always the biggest, so adding a task is just an append.
+#
+# Other parts of the app (export cache, search index, ...) can subscribe to
+# changes with store.subscribe(callback). The callback gets (event, task) where
+# event is "add", "update" or "delete".
+#
+# Sync routes run in FastAPI's threadpool while async routes run on the event
+# loop, so every method takes a lock to keep the indexes consistent.
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+PRIORITIES = ("low", "medium", "high")
+
+
+def _add_id(ids: List[int], task_id: int) -> None:
+    # Append when the id is the newest one, otherwise insert in sorted position
+    if not ids or ids[-1] < task_id:
+        ids.append(task_id)
+    else:
+        insort(ids, task_id)
+
+
+def _remove_id(ids: List[int], task_id: int) -> None:
+    # Binary search for the id, then delete it in place (no list rebuild)
+    i = bisect_left(ids, task_id)
+    if i < len(ids) and ids[i] == task_id:
+        del ids[i]
+
+
+class TaskStore:
+    """
+    Holds all tasks in memory and keeps the indexes in sync
+    EVERY change to a task must go through this class, otherwise the
+    secondary indexes would point at stale values
+    """
+
+    def __init__(self):
+        self._by_id: Dict[int, object] = {}
+        self._ids: List[int] = []
+        self._by_completed: Dict[bool, List[int]] = {True: [], False: []}
+        self._by_priority: Dict[str, List[int]] = {p: [] for p in PRIORITIES}
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self._listeners: List[Callable] = []
+        self.version = 0
+        # Goes up by one on every change - anything derived from the store
+        # (like cached responses) is still valid while the version is the same
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def subscribe(self, callback: Callable) -> None:
+        # callback(event, task) runs after every change, while the lock is held,
+        # so it must be quick (update a dict, bump a counter, ...)
+        self._listeners.append(callback)
+
+    def _notify(self, event: str, task) -> None:
+        self.version += 1
+        for callback in self._listeners:
+            callback(event, task)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def next_id(self) -> int:
+        # Hands out the next id (same job as the old task_id_counter)
+        return self.reserve_ids(1).start
+
+    def reserve_ids(self, count: int) -> range:
+        # Hands out a block of `count` ids in one go (used by bulk inserts)
+        with self._lock:
+            block = range(self._next_id, self._next_id + count)
+            self._next_id += count
+            return block
+
+    def add(self, task) -> None:
+        with self._lock:
+            self._by_id[task.id] = task
+            _add_id(self._ids, task.id)
+            _add_id(self._by_completed[task.completed], task.id)
+            _add_id(self._by_priority[task.priority], task.id)
+            self._notify("add", task)
+
+    def add_many(self, new_tasks) -> None:
+        # One lock round trip for the whole batch
+        with self._lock:
+            for task in new_tasks:
+                self.add(task)
+
+    def set_completed(self, task_id: int, completed: bool = True):
+        with self._lock:
+            task = self._by_id.get(task_id)
+            if task is None:
+                return None
+            if task.completed != completed:
+                # Move the id from one bucket to the other
+                _remove_id(self._by_completed[task.completed], task_id)
+                _add_id(self._by_completed[completed], task_id)
+                task.completed = completed
+                self._notify("update", task)
+            return task
+
+    def set_priority(self, task_id: int, priority: str):
+        with self._lock:
+            task = self._by_id.get(task_id)
+            if task is None:
+                return None
+            if task.priority != priority:
+                _remove_id(self._by_priority[task.priority], task_id)
+                _add_id(self._by_priority[priority], task_id)
+                task.priority = priority
+                self._notify("update", task)
+            return task
+
+    def delete(self, task_id: int):
+        with self._lock:
+            task = self._by_id.pop(task_id, None)
+            if task is None:
+                return None
+            _remove_id(self._ids, task_id)
+            _remove_id(self._by_completed[task.completed], task_id)
+            _remove_id(self._by_priority[task.priority], task_id)
+            self._notify("delete", task)
+            return task
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, task_id: int):
+        # O(1) dictionary lookup instead of looping over every task
+        return self._by_id.get(task_id)
+
+    def ids(self) -> List[int]:
+        # Copy of every id in order - a cheap snapshot to iterate over
+        # without holding the lock (used by the streaming export)
+        with self._lock:
+            return list(self._ids)
+
+    def query(
+        self,
+        completed: Optional[bool] = None,
+        priority: Optional[str] = None,
+        after: int = 0,
+        limit: int = 100,
+    ) -> Tuple[List, Optional[int]]:
+        """
+        One page of tasks matching the filters, ordered by id
+        Keyset pagination: `after` is the last id the client already has,
+        so we bisect straight to it instead of skipping rows one by one
+        Returns (tasks, next_cursor) - next_cursor is None on the last page
+        """
+        with self._lock:
+            # Start from the smallest index that covers the filters
+            candidates = []
+            if completed is not None:
+                candidates.append(self._by_completed[completed])
+            if priority is not None:
+                candidates.append(self._by_priority[priority])
+            if not candidates:
+                candidates.append(self._ids)
+            ids = min(candidates, key=len)
+
+            page = []
+            for i in range(bisect_right(ids, after), len(ids)):
+                task = self._by_id[ids[i]]
+                # The other filter (if any) is checked per task
+                if completed is not None and task.completed != completed:
+                    continue
+                if priority is not None and task.priority != priority:
+                    continue
+                if len(page) == limit:
+                    # There is at least one more match -> hand out a cursor
+                    return page, page[-1].id
+                page.append(task)
+            return page, None
@@ -0,0 +1,40 @@
+# ============================================================================
+# TESTS - write-behind queue (python -m pytest test_write_behind.py)
+# ============================================================================
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import models
+import schemas
+from database import Base
+from write_behind import WriteBehindQueue
+
+
+def make_session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tasks.db'}")
+    Base.metadata.create_all(engine)
+    # Same settings as database.SessionLocal
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+def test_two_writes_to_one_task_in_one_batch(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    with session_factory() as db:
+        task_id = crud.create_task(db, schemas.TaskCreate(title="abc")).id
+
+    # A long window, so both writes land in the same batch (same session)
+    write_queue = WriteBehindQueue(session_factory, max_delay=0.5)
+    completed = write_queue.submit(crud.complete_task, task_id)
+    renamed = write_queue.submit(crud.update_task, task_id, schemas.TaskUpdate(title="zzz"))
+    first, second = completed.result(timeout=5), renamed.result(timeout=5)
+    write_queue.close()
+
+    with session_factory() as db:
+        row = db.get(models.Task, task_id)
+        assert (row.title, row.completed) == ("zzz", True)
+
+    # Neither result may be the task as it was before the batch
+    assert first.completed is True
+    assert (second.title, second.completed) == ("zzz", True)
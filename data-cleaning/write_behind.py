@@ -0,0 +1,150 @@
+# ============================================================================
+# WRITE-BEHIND QUEUE - Group many task writes into ONE transaction
+# ============================================================================
+#
+# Without this, every create / complete / update is its own transaction, and
+# every transaction ends with a sync to disk. Under a burst of writes the
+# requests mostly wait for the disk, one after the other.
+#
+# Here the routes hand their write to a queue instead. One background thread
+# takes everything that arrived within WRITE_BEHIND_MAX_DELAY_MS (or up to
+# WRITE_BEHIND_MAX_BATCH writes), runs it all in one session and commits once.
+#
+# WRITE_BEHIND (environment variable) picks the durability:
+#   off     -> no queue, each route commits by itself (default)
+#   commit  -> the request waits until its batch is committed (safe)
+#   enqueue -> the request returns 202 as soon as the write is queued
+#              (fastest, but writes still in the queue are lost on a crash)
+
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "off")
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "500"))
+WRITE_BEHIND_MAX_DELAY_MS = float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "5"))
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Runs submitted writes in batches on a background thread
+    A write is func(session, *args, commit=False) - e.g. crud.create_task
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        durability: str = "commit",
+        max_batch: int = WRITE_BEHIND_MAX_BATCH,
+        max_delay: float = WRITE_BEHIND_MAX_DELAY_MS / 1000,
+    ):
+        if durability not in ("commit", "enqueue"):
+            raise ValueError(f"durability must be 'commit' or 'enqueue', got {durability!r}")
+        self.durability = durability
+        self._session_factory = session_factory
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def ack_on_enqueue(self) -> bool:
+        return self.durability == "enqueue"
+
+    def submit(self, func: Callable, *args) -> Future:
+        # The Future gets the write's return value once its batch is committed
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((func, args, future))
+        return future
+
+    def close(self) -> None:
+        # Writes everything still queued, then stops the thread
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="write-behind", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stop = False
+
+            # Keep collecting until the batch is full or the window is over
+            deadline = time.monotonic() + self._max_delay
+            while len(batch) < self._max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write_batch(batch)
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Tuple]) -> None:
+        results = []
+        try:
+            with self._session_factory() as db:
+                for func, args, _ in batch:
+                    results.append(func(db, *args, commit=False))
+                db.commit()  # ONE commit for the whole batch
+        except Exception:
+            # Something in the batch failed and the transaction was rolled back.
+            # Redo the writes one by one so only the bad one reports an error.
+            for item in batch:
+                self._write_one(item)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _write_one(self, item: Tuple) -> None:
+        func, args, future = item
+        try:
+            with self._session_factory() as db:
+                result = func(db, *args, commit=False)
+                db.commit()
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+
+def create_write_queue() -> Optional[WriteBehindQueue]:
+    # Queue configured from WRITE_BEHIND, or None when it is switched off
+    if WRITE_BEHIND == "off":
+        return None
+    from database import SessionLocal
+
+    write_queue = WriteBehindQueue(SessionLocal, durability=WRITE_BEHIND)
+    atexit.register(write_queue.close)
+    return write_queue
@@ -0,0 +1,150 @@
+import os
+import pickle
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+# lap data loader for the race prediction scripts
+#
+# session.load() with no arguments pulls laps, car telemetry, position data,
+# weather and race control messages - tens of MB and many requests - and the
+# scripts only keep five lap columns. here we:
+#   - load only the lap timing tables (laps=True, everything else False)
+#   - read from the local FastF1 cache in offline mode (no network), and only
+#     go online when the cache doesn't have the session yet
+#   - keep just the columns we need and drop the session object, so the rest
+#     of the timing data can be freed right away
+#   - remember the result, so a second load in the same run is free
+#
+# without fastf1 installed, load_laps_from_blob() reads a cached FastF1
+# timing file (like _extended_timing_data.ff1pkl) directly with pickle
+#
+# python f1_data.py  -> cold / warm load time and memory
+
+CACHE_DIR = Path(__file__).resolve().parent / "f1_cache"
+TIMING_BLOB = Path(__file__).resolve().parent / "_extended_timing_data.ff1pkl"
+LAP_COLUMNS = ["Driver", "LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]
+TIME_COLUMNS = ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]
+
+# F1_OFFLINE=1 -> never touch the network, fail if the cache is missing the session
+STRICT_OFFLINE = os.getenv("F1_OFFLINE", "0") == "1"
+
+# car number -> driver code for 2024 (the timing blob only has car numbers)
+DRIVER_NUMBERS = {
+    "1": "VER", "2": "SAR", "3": "RIC", "4": "NOR", "10": "GAS", "11": "PER", "14": "ALO",
+    "16": "LEC", "18": "STR", "20": "MAG", "22": "TSU", "23": "ALB", "24": "ZHO", "27": "HUL",
+    "30": "LAW", "31": "OCO", "38": "BEA", "43": "COL", "44": "HAM", "55": "SAI", "61": "DOO",
+    "63": "RUS", "77": "BOT", "81": "PIA",
+}
+
+_loaded = {}
+
+
+def enable_cache(cache_dir=CACHE_DIR, offline=True):
+    import fastf1
+
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    fastf1.Cache.enable_cache(str(cache_dir))
+    fastf1.Cache.offline_mode(offline)
+
+
+def _cache_miss(error):
+    # offline mode only hands out cached data. a session that isn't cached
+    # loads without timing data (session.laps -> DataNotLoadedError), and an
+    # uncached season fails at the schedule lookup in get_session
+    from fastf1.core import DataNotLoadedError
+
+    if isinstance(error, DataNotLoadedError):
+        return True
+    return isinstance(error, ValueError) and "schedule" in str(error).lower()
+
+
+def _load_session(year, gp, identifier, offline):
+    import fastf1
+
+    enable_cache(offline=offline)
+    session = fastf1.get_session(year, gp, identifier)
+    session.load(laps=True, telemetry=False, weather=False, messages=False)
+    session.laps  # raises DataNotLoadedError if the timing data didn't load
+    return session
+
+
+def load_laps(year, gp, identifier="R", columns=LAP_COLUMNS, offline=True):
+    """
+    lap timing table of one session, only `columns`
+    offline first; if the session isn't cached yet it is downloaded once
+    (unless F1_OFFLINE=1) and comes from the cache after that
+    any other error (bad column name, broken cache file, ...) is raised as is
+    """
+    key = (year, gp, identifier, tuple(columns))
+    if key not in _loaded:
+        try:
+            session = _load_session(year, gp, identifier, offline)
+        except Exception as e:
+            if not offline or STRICT_OFFLINE or not _cache_miss(e):
+                raise
+            # not in the cache yet -> one online load fills it
+            session = _load_session(year, gp, identifier, offline=False)
+        # plain DataFrame copy: no reference back to the session and its other tables
+        _loaded[key] = pd.DataFrame(session.laps[list(columns)]).reset_index(drop=True)
+    return _loaded[key].copy()
+
+
+def load_laps_from_blob(path=TIMING_BLOB, columns=LAP_COLUMNS):
+    """
+    laps straight from a FastF1 cache file, no fastf1 needed
+    the file is {"version": ..., "data": (laps, stream data, ...)}
+    """
+    key = (str(path), tuple(columns))
+    if key not in _loaded:
+        with open(path, "rb") as f:
+            laps = pickle.load(f)["data"][0]
+        wanted = [col for col in columns if col != "Driver"]
+        projected = laps[wanted].copy()
+        projected.insert(0, "Driver", laps["Driver"].astype(str).map(DRIVER_NUMBERS).fillna(laps["Driver"]))
+        if "Driver" not in columns:
+            projected = projected.drop(columns="Driver")
+        _loaded[key] = projected.reset_index(drop=True)
+    return _loaded[key].copy()
+
+
+def add_seconds(laps, columns=TIME_COLUMNS):
+    # "LapTime" (timedelta) -> "LapTime (s)" (float seconds), like the scripts use
+    for col in columns:
+        if col in laps:
+            laps[f"{col} (s)"] = laps[col].dt.total_seconds()
+    return laps
+
+
+def measure(label, load):
+    tracemalloc.start()
+    start = time.perf_counter()
+    laps = load()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size = laps.memory_usage(deep=True).sum()
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms   peak {peak / 2**20:7.1f} MB   "
+          f"result {size / 2**10:7.1f} KB   {len(laps)} laps")
+    return laps
+
+
+if __name__ == "__main__":
+    # from disk = parse the cache file (memo cleared first), memoized = repeat
+    # in the same process (only the DataFrame copy)
+    if TIMING_BLOB.exists():
+        measure("blob from disk", load_laps_from_blob)
+        _loaded.clear()
+        measure("blob from disk again", load_laps_from_blob)
+        measure("blob memoized", load_laps_from_blob)
+    try:
+        import fastf1  # noqa: F401
+    except ImportError:
+        print("fastf1 not installed, skipping the session loader")
+    else:
+        measure("fastf1 first load", lambda: load_laps(2024, 24, "R"))
+        _loaded.clear()
+        measure("fastf1 offline cache", lambda: load_laps(2024, 24, "R"))
+        measure("fastf1 memoized", lambda: load_laps(2024, 24, "R"))
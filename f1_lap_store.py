@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from f1_data import enable_cache, load_laps
+
+# multi-season lap store for training the race models
+#
+# abuDhabhi.py trains on one race (about a dozen rows). this builds a store
+# with the laps of every race of several seasons:
+#
+#   lap_store/
+#     season=2024/round=05/laps.npz   one file per race, one array per column
+#     manifest.json                   which races are in the store + per-driver sums
+#     driver_aggregates.csv           mean lap / sector times per driver
+#
+# - races are loaded from the local FastF1 cache (f1_data.load_laps, laps
+#   only) in a process pool, one race per task
+# - LapTime / Sector*Time become float seconds in one numpy step per column
+# - reruns only load races that aren't in manifest.json yet (incremental)
+# - every race also stores its per-driver sums and counts in the manifest, so
+#   the driver aggregates are re-added from those numbers instead of reading
+#   all the laps again
+#
+# python f1_lap_store.py --seasons 2022-2024 --jobs 4
+# laps = load_store(seasons=[2023, 2024]); aggregates = driver_aggregates()
+
+STORE_DIR = Path(__file__).resolve().parent / "lap_store"
+TIME_COLUMNS = ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]
+SECONDS_COLUMNS = [f"{col} (s)" for col in TIME_COLUMNS]
+LOAD_COLUMNS = ["Driver", "LapNumber"] + TIME_COLUMNS
+
+
+def to_seconds(values):
+    # timedelta column -> float seconds, NaT -> NaN (no per-row Python)
+    nanoseconds = np.asarray(values, dtype="timedelta64[ns]")
+    seconds = nanoseconds.view(np.int64) / 1e9
+    seconds[np.isnat(nanoseconds)] = np.nan
+    return seconds
+
+
+def partition_dir(store_dir, season, round_number):
+    return Path(store_dir) / f"season={season}" / f"round={round_number:02d}"
+
+
+def race_rounds(season):
+    # round numbers of the races in a season (schedule from the FastF1 cache)
+    import fastf1
+
+    enable_cache(offline=True)  # local cache only, no network
+    schedule = fastf1.get_event_schedule(season, include_testing=False)
+    return [int(r) for r in schedule["RoundNumber"] if r > 0]
+
+
+def build_partition(season, round_number, store_dir):
+    """
+    loads one race and writes its partition
+    runs in a worker process; returns what goes into the manifest
+    """
+    laps = load_laps(season, round_number, "R", columns=LOAD_COLUMNS)
+    arrays = {
+        "Driver": laps["Driver"].to_numpy(dtype=str),
+        "LapNumber": laps["LapNumber"].to_numpy(dtype=np.float64),
+    }
+    for col, seconds_col in zip(TIME_COLUMNS, SECONDS_COLUMNS):
+        arrays[seconds_col] = to_seconds(laps[col])
+
+    folder = partition_dir(store_dir, season, round_number)
+    folder.mkdir(parents=True, exist_ok=True)
+    # write to a temp name and rename, so a crashed run never leaves half a file
+    tmp = folder / f"laps.{os.getpid()}.tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, folder / "laps.npz")
+
+    # per-driver sums / counts of every seconds column (NaN laps don't count)
+    frame = pd.DataFrame({col: arrays[col] for col in SECONDS_COLUMNS})
+    frame["Driver"] = arrays["Driver"]
+    grouped = frame.groupby("Driver")
+    sums, counts = grouped.sum(), grouped.count()
+    drivers = {
+        driver: {col: [float(sums.at[driver, col]), int(counts.at[driver, col])] for col in SECONDS_COLUMNS}
+        for driver in sums.index
+    }
+    return {"season": season, "round": round_number, "rows": len(laps), "drivers": drivers,
+            "built_at": time.time()}
+
+
+# ----------------------------------------------------------------------------
+# manifest + aggregates
+# ----------------------------------------------------------------------------
+
+def read_manifest(store_dir=STORE_DIR):
+    try:
+        return json.loads((Path(store_dir) / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return {"partitions": {}}
+
+
+def write_manifest(manifest, store_dir=STORE_DIR):
+    path = Path(store_dir) / "manifest.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"manifest.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=1))
+    os.replace(tmp, path)
+
+
+def partition_key(season, round_number):
+    return f"{season}-{round_number:02d}"
+
+
+def driver_aggregates(store_dir=STORE_DIR, seasons=None, manifest=None):
+    """
+    mean lap / sector seconds and lap count per driver, from the manifest sums
+    (same numbers as laps.groupby("Driver").agg("mean") over the whole store)
+    """
+    manifest = manifest or read_manifest(store_dir)
+    totals = {}
+    for entry in manifest["partitions"].values():
+        if seasons is not None and entry["season"] not in seasons:
+            continue
+        for driver, stats in entry["drivers"].items():
+            driver_totals = totals.setdefault(driver, {col: [0.0, 0] for col in SECONDS_COLUMNS})
+            for col, (total, count) in stats.items():
+                driver_totals[col][0] += total
+                driver_totals[col][1] += count
+
+    rows = []
+    for driver, stats in sorted(totals.items()):
+        row = {"Driver": driver, "Laps": stats["LapTime (s)"][1]}
+        for col, (total, count) in stats.items():
+            row[col] = total / count if count else np.nan
+        rows.append(row)
+    aggregates = pd.DataFrame(rows, columns=["Driver", "Laps"] + SECONDS_COLUMNS)
+    aggregates["TotalSectorTime (s)"] = aggregates[SECONDS_COLUMNS[1:]].sum(axis=1, min_count=3)
+    return aggregates
+
+
+def load_store(store_dir=STORE_DIR, seasons=None, rounds=None, columns=None):
+    # all (or some) partitions as one DataFrame, with Season / Round columns
+    frames = []
+    manifest = read_manifest(store_dir)
+    for entry in sorted(manifest["partitions"].values(), key=lambda e: (e["season"], e["round"])):
+        if seasons is not None and entry["season"] not in seasons:
+            continue
+        if rounds is not None and entry["round"] not in rounds:
+            continue
+        with np.load(partition_dir(store_dir, entry["season"], entry["round"]) / "laps.npz") as data:
+            names = columns or data.files
+            frame = pd.DataFrame({name: data[name] for name in names})
+        frame.insert(0, "Round", entry["round"])
+        frame.insert(0, "Season", entry["season"])
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["Season", "Round"] + (columns or ["Driver", "LapNumber"] + SECONDS_COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+# ----------------------------------------------------------------------------
+# build
+# ----------------------------------------------------------------------------
+
+def build_store(seasons, store_dir=STORE_DIR, jobs=1, rebuild=False):
+    """
+    loads every race of `seasons` that isn't in the store yet
+    returns (built, skipped, failed) lists of "season-round" keys
+    """
+    store_dir = Path(store_dir)
+    if rebuild:
+        shutil.rmtree(store_dir, ignore_errors=True)
+    manifest = read_manifest(store_dir)
+
+    todo, skipped = [], []
+    for season in seasons:
+        for round_number in race_rounds(season):
+            key = partition_key(season, round_number)
+            if key in manifest["partitions"]:
+                skipped.append(key)
+            else:
+                todo.append((season, round_number))
+
+    built, failed = [], []
+
+    def done(key, entry):
+        manifest["partitions"][key] = entry
+        built.append(key)
+        # manifest is saved after every race, so an interrupted run keeps its progress
+        write_manifest(manifest, store_dir)
+
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(build_partition, s, r, store_dir): (s, r) for s, r in todo}
+            for future in as_completed(futures):
+                key = partition_key(*futures[future])
+                try:
+                    done(key, future.result())
+                except Exception as e:
+                    failed.append((key, repr(e)))
+    else:
+        for season, round_number in todo:
+            key = partition_key(season, round_number)
+            try:
+                done(key, build_partition(season, round_number, store_dir))
+            except Exception as e:
+                failed.append((key, repr(e)))
+
+    store_dir.mkdir(parents=True, exist_ok=True)
+    driver_aggregates(store_dir, manifest=manifest).to_csv(store_dir / "driver_aggregates.csv", index=False)
+    return built, skipped, failed
+
+
+def parse_seasons(text):
+    # "2022-2024" or "2021,2023"
+    seasons = []
+    for part in text.split(","):
+        start, _, end = part.partition("-")
+        seasons.extend(range(int(start), int(end or start) + 1))
+    return seasons
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="build the multi-season lap store")
+    parser.add_argument("--seasons", default="2022-2024")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rebuild", action="store_true", help="start from an empty store")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    built, skipped, failed = build_store(parse_seasons(args.seasons), args.store, args.jobs, args.rebuild)
+    print(f"built {len(built)} races, {len(skipped)} already in the store, "
+          f"{len(failed)} failed in {time.perf_counter() - start:.1f}s")
+    for key, error in failed:
+        print(f"  {key}: {error}")
+    print(driver_aggregates(args.store).head(20).to_string(index=False))
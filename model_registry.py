@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.impute import SimpleImputer
+from sklearn.model_selection import train_test_split
+
+# model registry for the race prediction models
+#
+# a trained model is saved together with everything needed to use it again:
+# the fitted imputer and the feature list (column order matters!). the folder
+# name is a hash of the training data + hyperparameters, so
+#   same data, same params    -> load the saved model, no training
+#   anything changed          -> train, save under the new hash
+#
+#   model_registry/
+#     <hash>/bundle.joblib    model + imputer + features
+#     <hash>/meta.json        params, rows, when, library versions
+#     latest.json             hash of the last trained / loaded model
+#
+# bundle = train_or_load(X, y, params)     (see abuDhabhi.py)
+# bundle = load_latest()                   (see race_service.py)
+
+REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", Path(__file__).resolve().parent / "model_registry"))
+
+
+@dataclass
+class ModelBundle:
+    model: object
+    imputer: SimpleImputer
+    features: list
+    key: str
+    meta: dict = field(default_factory=dict)
+    trained: bool = False  # False = loaded from the registry
+
+    def predict(self, rows):
+        # rows: DataFrame (or list of dicts) with the feature columns, any order
+        frame = pd.DataFrame(rows)
+        missing = [col for col in self.features if col not in frame]
+        if missing:
+            raise ValueError(f"missing feature columns: {missing}")
+        X = frame[self.features].astype(np.float64)  # NaN = fill with the imputer
+        return self.model.predict(self.imputer.transform(X))
+
+
+def _default_model(params):
+    from xgboost import XGBRegressor
+
+    return XGBRegressor(**params)
+
+
+def model_key(X, y, params, model_name="XGBRegressor", test_size=0.1, random_state=39):
+    # hash of the training data (values, column names and order) + params
+    # + the split settings (they pick which rows the model is trained on)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(list(X.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y, dtype=np.float64)), index=False)
+                  .to_numpy().tobytes())
+    digest.update(json.dumps({"model": model_name, "params": params, "test_size": test_size,
+                              "random_state": random_state}, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def save(bundle, registry_dir=REGISTRY_DIR):
+    folder = Path(registry_dir) / bundle.key
+    folder.mkdir(parents=True, exist_ok=True)
+    tmp = folder / f"bundle.{os.getpid()}.tmp"
+    joblib.dump({"model": bundle.model, "imputer": bundle.imputer, "features": bundle.features}, tmp)
+    os.replace(tmp, folder / "bundle.joblib")
+    (folder / "meta.json").write_text(json.dumps(bundle.meta, indent=2, default=str))
+    return folder
+
+
+def load(key, registry_dir=REGISTRY_DIR):
+    folder = Path(registry_dir) / key
+    try:
+        saved = joblib.load(folder / "bundle.joblib")
+        meta = json.loads((folder / "meta.json").read_text())
+    except (OSError, EOFError, ValueError):
+        return None
+    return ModelBundle(saved["model"], saved["imputer"], saved["features"], key, meta)
+
+
+def set_latest(key, registry_dir=REGISTRY_DIR):
+    path = Path(registry_dir) / "latest.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"key": key, "at": time.time()}))
+
+
+def load_latest(registry_dir=REGISTRY_DIR):
+    try:
+        key = json.loads((Path(registry_dir) / "latest.json").read_text())["key"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return load(key, registry_dir)
+
+
+def train_or_load(X, y, params, test_size=0.1, random_state=39, make_model=_default_model,
+                  model_name="XGBRegressor", registry_dir=REGISTRY_DIR):
+    """
+    the abuDhabhi.py training steps (median imputer, train/test split, fit),
+    skipped when a model for exactly this data + params is in the registry
+    """
+    key = model_key(X, y, params, model_name, test_size, random_state)
+    bundle = load(key, registry_dir)
+    if bundle is None:
+        imputer = SimpleImputer(strategy="median")
+        X_imputed = imputer.fit_transform(X)
+        X_train, _, y_train, _ = train_test_split(X_imputed, y, test_size=test_size, random_state=random_state)
+        start = time.perf_counter()
+        model = make_model(params)
+        model.fit(X_train, y_train)
+        meta = {
+            "model": model_name,
+            "params": params,
+            "features": list(X.columns),
+            "rows": len(X),
+            "test_size": test_size,
+            "random_state": random_state,
+            "train_seconds": round(time.perf_counter() - start, 3),
+            "trained_at": time.time(),
+            "versions": {
+                "sklearn": sklearn.__version__,
+                "model": getattr(sys.modules[type(model).__module__.split(".")[0]], "__version__", None),
+            },
+        }
+        bundle = ModelBundle(model, imputer, list(X.columns), key, meta, trained=True)
+        save(bundle, registry_dir)
+    set_latest(key, registry_dir)
+    return bundle
@@ -0,0 +1,68 @@
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from model_registry import load_latest
+
+# batch predictions from the latest race model in the registry
+#
+# the model is loaded ONCE (first request) and kept in memory; one request
+# can score many driver / scenario rows, they all go through a single
+# imputer.transform + model.predict call instead of one call per row
+#
+#   uvicorn race_service:app
+#   POST /predict {"rows": [{"Driver": "VER", "QualifyingTime": 82.2, "RainProbability": 0.05,
+#                            "Temperature": 28, "TeamPerformanceScore": 0.53,
+#                            "CleanAirRacePace (s)": 93.19}, ...]}
+# missing / null feature values are filled by the model's imputer
+
+app = FastAPI(title="Race prediction service")
+
+MAX_ROWS = 10_000
+
+
+class PredictRequest(BaseModel):
+    rows: List[Dict[str, Optional[float | str]]]
+
+
+@lru_cache(maxsize=1)
+def get_model():
+    bundle = load_latest()
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="No trained model in the registry yet, run abuDhabhi.py")
+    return bundle
+
+
+def reload_model():
+    # after training a new model: drop the cached one, the next request loads the new latest
+    get_model.cache_clear()
+
+
+@app.get("/model")
+def model_info():
+    bundle = get_model()
+    return {"key": bundle.key, "features": bundle.features, "meta": bundle.meta}
+
+
+@app.post("/predict")
+def predict(request: PredictRequest):
+    if not request.rows:
+        return {"model": None, "predictions": []}
+    if len(request.rows) > MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_ROWS} rows per request")
+    bundle = get_model()
+    # extra columns (like "Driver") are passed through, only the features go to the model
+    features = [{name: row.get(name) for name in bundle.features} for row in request.rows]
+    try:
+        predictions = bundle.predict(features)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "model": bundle.key,
+        "predictions": [
+            {**{k: v for k, v in row.items() if k not in bundle.features}, "PredictedRaceTime (s)": float(p)}
+            for row, p in zip(request.rows, predictions)
+        ],
+    }
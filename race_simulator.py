@@ -0,0 +1,159 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# monte carlo race simulator
+#
+# abuDhabhi.py makes ONE prediction with one rain probability and switches
+# the wet factors on at a hard rain_probability >= 0.75. here we simulate
+# many possible races instead and count where every driver finishes:
+#
+# every scenario samples
+#   - the rain probability around the forecast (beta distribution)
+#   - whether it actually rains (then qualifying pace gets the driver's
+#     WetPerformanceFactor, so wet skill matters in proportion to the risk)
+#   - the track temperature around the forecast
+#   - race-day pace noise per driver (added to the predicted race time)
+#
+# the features of ALL scenarios x drivers are built as one numpy array and
+# scored with one model.predict call per chunk (CHUNK_SCENARIOS scenarios),
+# optionally with chunks spread over a process pool. chunk k always uses
+# random seed (seed, k), so the result is the same for any number of jobs.
+#
+#   result = simulate(bundle, drivers, n_scenarios=100_000, rain_probability=0.05, temperature=28)
+#   result[["Driver", "Win", "Podium", "ExpectedPosition"]]
+
+CHUNK_SCENARIOS = 20_000
+DEFAULT_WET_FACTOR = 1.03
+RAIN_CONCENTRATION = 20.0  # higher = rain probability stays closer to the forecast
+TEMPERATURE_SD = 2.0       # degrees C
+PACE_NOISE_SD = 0.3        # seconds per lap
+
+# scenario features (everything else in the model's feature list comes from the drivers table)
+QUALI_COLUMN = "QualifyingTime (s)"
+WET_COLUMN = "WetPerformanceFactor"
+
+
+def _scenario_features(bundle, drivers, n, rng, rain_probability, temperature, temperature_sd):
+    """
+    (n * n_drivers, n_features) DataFrame, scenario-major: row s * D + d
+    """
+    n_drivers = len(drivers)
+    # rain probability ~ Beta with mean = forecast (kept inside (0, 1))
+    mean = min(max(rain_probability, 1e-3), 1 - 1e-3)
+    rain_p = rng.beta(mean * RAIN_CONCENTRATION, (1 - mean) * RAIN_CONCENTRATION, n)
+    rains = rng.random(n) < rain_p
+    temp = rng.normal(temperature, temperature_sd, n)
+
+    quali = drivers[QUALI_COLUMN].to_numpy(dtype=np.float64)
+    wet = drivers[WET_COLUMN].to_numpy(dtype=np.float64) if WET_COLUMN in drivers else \
+        np.full(n_drivers, DEFAULT_WET_FACTOR)
+    wet = np.where(np.isnan(wet), DEFAULT_WET_FACTOR, wet)
+
+    columns = {}
+    for name in bundle.features:
+        if name == "QualifyingTime":
+            # (n, D): dry pace, or wet pace in the scenarios where it rains
+            columns[name] = np.where(rains[:, None], quali * wet, quali).ravel()
+        elif name == "RainProbability":
+            columns[name] = np.repeat(rain_p, n_drivers)
+        elif name == "Temperature":
+            columns[name] = np.repeat(temp, n_drivers)
+        else:
+            columns[name] = np.tile(drivers[name].to_numpy(dtype=np.float64), n)
+    return pd.DataFrame(columns, columns=bundle.features)
+
+
+def simulate_chunk(bundle, drivers, chunk_index, n, seed, rain_probability, temperature,
+                   temperature_sd=TEMPERATURE_SD, pace_noise_sd=PACE_NOISE_SD):
+    """
+    n scenarios -> positions count matrix (driver x finishing position)
+    """
+    rng = np.random.default_rng([seed, chunk_index])
+    n_drivers = len(drivers)
+    X = _scenario_features(bundle, drivers, n, rng, rain_probability, temperature, temperature_sd)
+    # one batched predict for every scenario x driver of the chunk
+    race_times = bundle.model.predict(bundle.imputer.transform(X)).reshape(n, n_drivers)
+    race_times = race_times + rng.normal(0, pace_noise_sd, race_times.shape)
+
+    # position of every driver in every scenario (0 = winner)
+    order = np.argsort(race_times, axis=1, kind="stable")
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(n_drivers)[None, :], axis=1)
+    # counts[d, p] = how often driver d finished at position p
+    cells = np.arange(n_drivers)[None, :] * n_drivers + positions
+    return np.bincount(cells.ravel(), minlength=n_drivers * n_drivers).reshape(n_drivers, n_drivers)
+
+
+def _chunk_task(args):
+    return simulate_chunk(*args)
+
+
+def simulate(bundle, drivers, n_scenarios=100_000, rain_probability=0.05, temperature=28.0,
+             temperature_sd=TEMPERATURE_SD, pace_noise_sd=PACE_NOISE_SD, seed=0, jobs=1,
+             chunk_scenarios=CHUNK_SCENARIOS):
+    """
+    bundle: model_registry.ModelBundle (model + imputer + feature list)
+    drivers: one row per driver with "Driver", QUALI_COLUMN, optionally
+             WET_COLUMN, and the model's other (static) features
+    returns one row per driver: Win, Podium, Top5, ExpectedPosition and
+    P1..Pn probabilities, best expected position first
+    """
+    drivers = drivers.reset_index(drop=True)
+    n_drivers = len(drivers)
+    chunks = []
+    for chunk_index, start in enumerate(range(0, n_scenarios, chunk_scenarios)):
+        n = min(chunk_scenarios, n_scenarios - start)
+        chunks.append((bundle, drivers, chunk_index, n, seed, rain_probability, temperature,
+                       temperature_sd, pace_noise_sd))
+
+    if jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            counts = sum(pool.map(_chunk_task, chunks))
+    else:
+        counts = sum(_chunk_task(chunk) for chunk in chunks)
+
+    probabilities = counts / n_scenarios
+    result = pd.DataFrame({
+        "Driver": drivers["Driver"],
+        "Win": probabilities[:, 0],
+        "Podium": probabilities[:, :3].sum(axis=1),
+        "Top5": probabilities[:, :5].sum(axis=1),
+        "ExpectedPosition": probabilities @ np.arange(1, n_drivers + 1),
+    })
+    for p in range(n_drivers):
+        result[f"P{p + 1}"] = probabilities[:, p]
+    return result.sort_values("ExpectedPosition").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    from model_registry import load_latest
+
+    parser = argparse.ArgumentParser(description="monte carlo race scenarios with the latest registry model")
+    parser.add_argument("--scenarios", type=int, default=100_000)
+    parser.add_argument("--rain", type=float, default=0.05, help="forecast rain probability (0-1)")
+    parser.add_argument("--temperature", type=float, default=28.0)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    bundle = load_latest()
+    if bundle is None:
+        raise SystemExit("no model in the registry yet, run abuDhabhi.py first")
+    # random demo grid, abuDhabhi.py runs the simulation with the real drivers
+    n_drivers = 13
+    rng = np.random.default_rng(1)
+    drivers = pd.DataFrame({
+        "Driver": [f"D{i:02d}" for i in range(n_drivers)],
+        QUALI_COLUMN: 82.2 + rng.random(n_drivers) * 1.3,
+        "TeamPerformanceScore": rng.random(n_drivers),
+        "CleanAirRacePace (s)": 93.2 + rng.random(n_drivers) * 2,
+    })
+    start = time.perf_counter()
+    result = simulate(bundle, drivers, args.scenarios, args.rain, args.temperature,
+                      seed=args.seed, jobs=args.jobs)
+    print(f"{args.scenarios} scenarios in {time.perf_counter() - start:.2f}s (jobs={args.jobs})")
+    print(result[["Driver", "Win", "Podium", "ExpectedPosition"]].to_string(index=False))
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+# character tokenizer (the one from Embedding_Vectors.ipynb) without per-character Python
+#
+# the notebook does
+#   encode = lambda s: [string_to_int[c] for c in s]
+# which builds a Python list one character at a time. here a string becomes
+# its unicode code points in one step (utf-32 bytes viewed as uint32) and a
+# lookup table turns those into token ids; decode goes the other way:
+#
+#   tok = CharTokenizer.from_text(text)
+#   ids = tok.encode(text)                  # numpy array, torch.from_numpy(ids) for a tensor
+#   tok.decode(ids[:100])
+#
+# big corpora never live in memory as one string: encode_file reads the text
+# in chunks and appends the ids to a .bin file (uint8 if the vocabulary has
+# <= 256 characters, else uint16), with the vocabulary in a .json sidecar:
+#
+#   python tokenizer.py dataset/wizard_of_oz.txt
+#   tokens, tok = load_tokens("dataset/wizard_of_oz.tokens.bin")   # np.memmap, nothing read yet
+
+CHUNK_CHARS = 1 << 22  # 4M characters per read
+DENSE_LUT_LIMIT = 0x30000  # code points below this use a dense lookup table, above: binary search
+
+
+def _code_points(text):
+    # str -> uint32 array of code points (no BOM with the explicit -le codec)
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+class CharTokenizer:
+    def __init__(self, chars):
+        # chars: the vocabulary, token id = position in sorted order (same as sorted(set(text)))
+        self.chars = sorted(set(map(str, chars)))
+        self.codes = np.array([ord(c) for c in self.chars], dtype=np.uint32)
+        if len(self.chars) <= 1 << 8:
+            self.dtype = np.dtype(np.uint8)
+        elif len(self.chars) <= 1 << 16:
+            self.dtype = np.dtype(np.uint16)
+        else:
+            self.dtype = np.dtype(np.uint32)
+
+        # code point -> token id; the slot after the last code point (and every
+        # hole) holds len(vocabulary) = "unknown", np.take(..., mode="clip")
+        # sends code points above the table there too
+        self.lut = None
+        if len(self.codes) and self.codes[-1] < DENSE_LUT_LIMIT:
+            self.lut = np.full(int(self.codes[-1]) + 2, len(self.codes),
+                               dtype=np.uint16 if len(self.codes) < 1 << 16 else np.uint32)
+            self.lut[self.codes] = np.arange(len(self.codes))
+
+    def __len__(self):
+        return len(self.chars)
+
+    @property
+    def vocab_size(self):
+        return len(self.chars)
+
+    @classmethod
+    def from_code_points(cls, points):
+        # chr() per distinct code point (a "<U1" view would turn NUL into "")
+        return cls([chr(int(point)) for point in points])
+
+    @classmethod
+    def from_text(cls, text):
+        return cls.from_code_points(np.unique(_code_points(text)))
+
+    @classmethod
+    def from_file(cls, path, chunk_chars=CHUNK_CHARS):
+        # vocabulary of a big file, one chunk in memory at a time
+        seen = np.zeros(0x110000, dtype=bool)  # one flag per possible code point
+        with open(path, encoding="utf-8", newline="") as f:
+            while chunk := f.read(chunk_chars):
+                seen[_code_points(chunk)] = True
+        return cls.from_code_points(np.flatnonzero(seen))
+
+    def encode(self, text):
+        """
+        str -> numpy array of token ids (self.dtype)
+        raises KeyError for characters that aren't in the vocabulary
+        """
+        points = _code_points(text)
+        if self.lut is not None:
+            ids = np.take(self.lut, points, mode="clip")
+            unknown = ids == len(self.codes)
+        else:
+            ids = np.searchsorted(self.codes, points)
+            unknown = ids >= len(self.codes)
+            unknown[~unknown] = self.codes[ids[~unknown]] != points[~unknown]
+        if unknown.any():
+            raise KeyError(chr(points[np.argmax(unknown)]))
+        return ids.astype(self.dtype, copy=False)
+
+    @property
+    def ascii(self):
+        return len(self.codes) > 0 and self.codes[-1] < 128
+
+    def encode_bytes(self, data):
+        """
+        ASCII-only vocabulary: utf-8 bytes -> token ids without decoding to str
+        (any non-ASCII byte is unknown, so the result always equals encode(data.decode()))
+        """
+        points = np.frombuffer(data, dtype=np.uint8)
+        ids = np.take(self.lut, points, mode="clip")
+        unknown = ids == len(self.codes)
+        if unknown.any():
+            raise KeyError(bytes(data[np.argmax(unknown):][:4]).decode("utf-8", "replace")[0])
+        return ids.astype(self.dtype, copy=False)
+
+    def decode(self, ids):
+        # token ids (list, numpy array, memmap slice or CPU tensor) -> str
+        ids = np.asarray(ids)
+        return self.codes[ids].astype("<u4").tobytes().decode("utf-32-le")
+
+    def save(self, path, **extra):
+        path = Path(path)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        meta = {"chars": self.chars, "dtype": self.dtype.name, **extra}
+        tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        return cls(json.loads(Path(path).read_text(encoding="utf-8"))["chars"])
+
+
+# ----------------------------------------------------------------------------
+# token files
+# ----------------------------------------------------------------------------
+
+def token_paths(text_path):
+    # dataset/wizard_of_oz.txt -> dataset/wizard_of_oz.tokens.bin + .tokens.json
+    text_path = Path(text_path)
+    stem = text_path.with_suffix("")
+    return stem.with_name(f"{stem.name}.tokens.bin"), stem.with_name(f"{stem.name}.tokens.json")
+
+
+def encode_file(text_path, bin_path=None, tokenizer=None, chunk_chars=CHUNK_CHARS):
+    """
+    streams a text file into a token .bin file + vocabulary sidecar
+    without a tokenizer the vocabulary comes from the file (one extra read)
+    returns (tokenizer, number of tokens)
+    """
+    if bin_path is None:
+        bin_path, vocab_path = token_paths(text_path)
+    else:
+        bin_path = Path(bin_path)
+        vocab_path = bin_path.with_suffix(".json")
+    tokenizer = tokenizer or CharTokenizer.from_file(text_path, chunk_chars)
+
+    n_tokens = 0
+    tmp = bin_path.with_name(f"{bin_path.name}.{os.getpid()}.tmp")
+    # ASCII vocabulary (plain English text): 1 byte = 1 character, skip utf-8 decoding
+    if tokenizer.ascii:
+        src, encode = open(text_path, "rb"), tokenizer.encode_bytes
+    else:
+        src, encode = open(text_path, encoding="utf-8", newline=""), tokenizer.encode
+    try:
+        with src, open(tmp, "wb") as dst:
+            while chunk := src.read(chunk_chars):
+                ids = encode(chunk)
+                ids.tofile(dst)
+                n_tokens += len(ids)
+    except BaseException:
+        # e.g. KeyError: the file has characters the given tokenizer doesn't know
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, bin_path)
+    tokenizer.save(vocab_path, tokens=n_tokens, source=Path(text_path).name)
+    return tokenizer, n_tokens
+
+
+def load_tokens(bin_path, vocab_path=None):
+    # (read-only np.memmap of the token ids, tokenizer); pages are read on access
+    bin_path = Path(bin_path)
+    vocab_path = Path(vocab_path) if vocab_path else bin_path.with_suffix(".json")
+    meta = json.loads(vocab_path.read_text(encoding="utf-8"))
+    tokenizer = CharTokenizer(meta["chars"])
+    if bin_path.stat().st_size == 0:
+        return np.empty(0, dtype=tokenizer.dtype), tokenizer
+    return np.memmap(bin_path, dtype=tokenizer.dtype, mode="r"), tokenizer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="text file -> memory-mapped character token file")
+    parser.add_argument("text", nargs="?", default=Path(__file__).resolve().parent / "dataset" / "wizard_of_oz.txt")
+    parser.add_argument("--out", default=None, help="token .bin path (default: next to the text file)")
+    parser.add_argument("--chunk-chars", type=int, default=CHUNK_CHARS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tokenizer, n_tokens = encode_file(args.text, args.out, chunk_chars=args.chunk_chars)
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(args.text)
+    print(f"{n_tokens} tokens, vocabulary {len(tokenizer)} ({tokenizer.dtype.name}) in {seconds:.2f}s "
+          f"({size / 1e6 / max(seconds, 1e-9):.0f} MB/s)")
+
+    tokens, tokenizer = load_tokens(args.out or token_paths(args.text)[0])
+    print(repr(tokenizer.decode(tokens[:100])))
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+# race weather for the prediction scripts
+#
+# where the numbers come from, first hit wins:
+#   1. disk cache (weather_cache/), if younger than WEATHER_CACHE_TTL seconds
+#   2. the backend:
+#        api     -> WeatherAPI.com forecast (needs WEATHERAPI_KEY)
+#        offline -> no network at all
+#        stub    -> fixed values, no network at all
+#   3. the disk cache again, even if it's old (better than nothing)
+#   4. DEFAULT_WEATHER (what abuDhabhi.py used when the API failed)
+#
+# WEATHER_BACKEND picks the backend (default: api if WEATHERAPI_KEY is set,
+# offline otherwise). offline / stub never import httpx or open a socket,
+# so predictions start right away.
+#
+# many circuits at once share one httpx.AsyncClient (connection reuse), with
+# timeouts, so one slow request can't hang the run:
+#   weather = get_weather("Abu Dhabi")
+#   many = asyncio.run(fetch_many([("Abu Dhabi", None), ("Lusail", "2025-11-30")]))
+
+WEATHER_API_URL = "http://api.weatherapi.com/v1/forecast.json"
+API_KEY = os.getenv("WEATHERAPI_KEY")
+BACKEND = os.getenv("WEATHER_BACKEND", "api" if API_KEY else "offline")
+CACHE_DIR = Path(os.getenv("WEATHER_CACHE_DIR", Path(__file__).resolve().parent / "weather_cache"))
+CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 3 * 3600))
+RACE_HOUR = 13  # races usually start around 1 PM local time
+MAX_FORECAST_DAYS = 14
+TIMEOUT_SECONDS = 5.0
+MAX_CONNECTIONS = 10
+
+DEFAULT_WEATHER = {"temperature": 28, "rain_probability": 0.05, "condition": "Sunny"}
+# default Abu Dhabi weather: warm, low rain probability
+
+
+@dataclass
+class RaceWeather:
+    temperature: float
+    rain_probability: float  # 0.0 - 1.0
+    condition: str
+    source: str  # cache / api / stub / stale-cache / default
+
+
+# ----------------------------------------------------------------------------
+# disk cache (one small JSON file per location + date + hour)
+# ----------------------------------------------------------------------------
+
+def cache_path(location, race_date, hour):
+    key = f"{location.strip().lower()}|{race_date}|{hour}"
+    name = hashlib.blake2b(key.encode(), digest_size=10).hexdigest()
+    return CACHE_DIR / f"{name}.json"
+
+
+def read_cache(location, race_date, hour, max_age=CACHE_TTL):
+    try:
+        entry = json.loads(cache_path(location, race_date, hour).read_text())
+    except (OSError, ValueError):
+        return None
+    if max_age is not None and time.time() - entry["fetched_at"] > max_age:
+        return None
+    return entry["weather"]
+
+
+def write_cache(location, race_date, hour, weather):
+    path = cache_path(location, race_date, hour)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"location": location, "date": str(race_date), "hour": hour,
+                               "fetched_at": time.time(), "weather": weather}))
+    os.replace(tmp, path)
+
+
+# ----------------------------------------------------------------------------
+# backends
+# ----------------------------------------------------------------------------
+
+def parse_forecast(data, race_date, hour=RACE_HOUR):
+    # picks the race DAY by date (not "the second day") and the race hour
+    for day in data["forecast"]["forecastday"]:
+        if day["date"] == str(race_date):
+            for entry in day["hour"]:
+                if int(entry["time"][-5:-3]) == hour:
+                    return {
+                        "temperature": entry["temp_c"],
+                        "rain_probability": entry["chance_of_rain"] / 100,  # percent -> 0-1
+                        "condition": entry["condition"]["text"],
+                    }
+    raise ValueError(f"forecast has no data for {race_date} {hour}:00")
+
+
+class ApiBackend:
+    """
+    WeatherAPI.com forecast
+    """
+
+    name = "api"
+
+    def __init__(self, api_key=API_KEY, url=WEATHER_API_URL):
+        if not api_key:
+            raise ValueError("WEATHERAPI_KEY is not set")
+        self.api_key = api_key
+        self.url = url
+
+    async def fetch(self, client, location, race_date, hour):
+        days = min(max((race_date - date.today()).days + 1, 1), MAX_FORECAST_DAYS)
+        params = {"key": self.api_key, "q": location, "days": days, "aqi": "no", "alerts": "no"}
+        response = await client.get(self.url, params=params)
+        response.raise_for_status()
+        return parse_forecast(response.json(), race_date, hour)
+
+
+class StubBackend:
+    """
+    fixed values, no network (tests, demos, offline laptops)
+    """
+
+    name = "stub"
+
+    def __init__(self, values=None):
+        self.values = dict(values or DEFAULT_WEATHER)
+
+    async def fetch(self, client, location, race_date, hour):
+        return dict(self.values)
+
+
+class OfflineBackend:
+    """
+    never fetches: only the cache tiers and the defaults are used
+    """
+
+    name = "offline"
+
+    async def fetch(self, client, location, race_date, hour):
+        return None
+
+
+def make_backend(name=BACKEND):
+    if name == "api":
+        return ApiBackend()
+    if name == "stub":
+        return StubBackend()
+    if name == "offline":
+        return OfflineBackend()
+    raise ValueError(f"unknown WEATHER_BACKEND {name!r}, must be api, offline or stub")
+
+
+# ----------------------------------------------------------------------------
+# lookups
+# ----------------------------------------------------------------------------
+
+def _race_date(race_date):
+    if race_date is None:
+        return date.today() + timedelta(days=1)  # race is tomorrow
+    if isinstance(race_date, str):
+        return date.fromisoformat(race_date)
+    return race_date
+
+
+async def _one(client, backend, location, race_date, hour):
+    cached = read_cache(location, race_date, hour)
+    if cached is not None:
+        return RaceWeather(**cached, source="cache")
+    try:
+        fetched = await backend.fetch(client, location, race_date, hour)
+    except Exception as e:
+        print(f"⚠️  Weather {backend.name} error for {location}: {e}")
+        fetched = None
+    if fetched is not None:
+        if backend.name == "api":
+            write_cache(location, race_date, hour, fetched)
+        return RaceWeather(**fetched, source=backend.name)
+    stale = read_cache(location, race_date, hour, max_age=None)
+    if stale is not None:
+        return RaceWeather(**stale, source="stale-cache")
+    return RaceWeather(**DEFAULT_WEATHER, source="default")
+
+
+async def fetch_many(races, backend=None, hour=RACE_HOUR):
+    """
+    races: [(location, race_date or None), ...] -> [RaceWeather, ...] in the same order
+    all network requests run at the same time over one pooled client
+    """
+    backend = backend or make_backend()
+    races = [(location, _race_date(race_date)) for location, race_date in races]
+    if not isinstance(backend, ApiBackend):
+        return [await _one(None, backend, location, race_date, hour) for location, race_date in races]
+
+    import httpx
+
+    timeout = httpx.Timeout(TIMEOUT_SECONDS, connect=2.0)
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        return await asyncio.gather(
+            *(_one(client, backend, location, race_date, hour) for location, race_date in races)
+        )
+
+
+def get_weather(location, race_date=None, hour=RACE_HOUR, backend=None):
+    # blocking helper for scripts
+    return asyncio.run(fetch_many([(location, race_date)], backend, hour))[0]
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    weather = get_weather("Abu Dhabi")
+    print(asdict(weather), f"{(time.perf_counter() - start) * 1000:.1f} ms")